@@ -0,0 +1,273 @@
+"""
+Performance benchmarks for the Dymaxion Labs client, run against a local
+fake API server (see :mod:`dymaxionlabs.testing`).
+
+Run all benchmarks and compare against the stored baseline::
+
+    python benchmarks/run.py
+
+Store current results as the new baseline::
+
+    python benchmarks/run.py --save-baseline
+
+The client side of each benchmark runs in a subprocess, so that its peak
+memory usage is measured apart from the fake API server, which keeps all
+files in memory.
+
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+# Benchmark the working tree, not an installed version of the package
+sys.path.insert(0, ROOT_DIR)
+
+BASELINE_PATH = os.path.join(BENCHMARKS_DIR, 'baseline.json')
+DEFAULT_TOLERANCE = 0.25  # allowed relative regression
+
+MB = 2**20
+
+# Metric name -> True if higher is better
+METRICS = {
+    'upload_small_mb_s': True,
+    'upload_resumable_mb_s': True,
+    'download_mb_s': True,
+    'list_tasks_per_s': True,
+    'polls_per_task': False,
+    'peak_rss_mb': False,
+    'import_time_s': False,
+}
+
+benchmarks = []
+clients = {}
+_client_rss = []
+
+
+def benchmark(func):
+    benchmarks.append(func)
+    return func
+
+
+def client(func):
+    clients[func.__name__] = func
+    return func
+
+
+def run_client(name, **kwargs):
+    """Runs client function ``name`` in a subprocess, so that its memory
+    usage is measured apart from the fake API server.  Returns its result
+    and elapsed time in seconds."""
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), '--client', name, json.dumps(kwargs)],
+        cwd=ROOT_DIR)
+    res = json.loads(output)
+    _client_rss.append(res['peak_rss_mb'])
+    return res['result'], res['elapsed']
+
+
+def _run_client_here(name, kwargs):
+    # Import modules used by clients before starting the clock
+    import dymaxionlabs.files  # noqa: F401
+    import dymaxionlabs.models  # noqa: F401
+    import dymaxionlabs.tasks  # noqa: F401
+
+    start = time.perf_counter()
+    result = clients[name](**json.loads(kwargs))
+    elapsed = time.perf_counter() - start
+    print(json.dumps(dict(result=result, elapsed=elapsed, peak_rss_mb=_peak_rss_mb())))
+
+
+def _write_random_file(dirname, name, size):
+    path = os.path.join(dirname, name)
+    with open(path, 'wb') as f:
+        f.write(os.urandom(size))
+    return path
+
+
+@client
+def upload_files(paths, storage_path, chunk_size=None):
+    from dymaxionlabs.files import File
+
+    for path in paths:
+        File.upload(path, storage_path, chunk_size=chunk_size)
+
+
+@client
+def download_file(path, output_dir):
+    from dymaxionlabs.files import File
+
+    File.get(path).download(output_dir)
+
+
+@client
+def list_all_tasks():
+    from dymaxionlabs.tasks import Task
+
+    return len(Task.all(columnar=True))
+
+
+@client
+def predict_and_wait(model, input_path, tasks):
+    from dymaxionlabs.models import Model
+
+    model = Model.get(model)
+    for _ in range(tasks):
+        task = model.predict(input_path)
+        task.wait_until_finished(interval=0.01)
+
+
+@benchmark
+def upload_small(server, tmpdir, files=50, size=512 * 1024):
+    paths = [_write_random_file(tmpdir, f'small_{i}.bin', size) for i in range(files)]
+    _, elapsed = run_client('upload_files', paths=paths, storage_path='bench/small/')
+    return {'upload_small_mb_s': files * size / MB / elapsed}
+
+
+@benchmark
+def upload_resumable(server, tmpdir, size=64 * MB):
+    path = _write_random_file(tmpdir, 'large.bin', size)
+    _, elapsed = run_client('upload_files', paths=[path], storage_path='bench/large/',
+                            chunk_size=8)
+    return {'upload_resumable_mb_s': size / MB / elapsed}
+
+
+@benchmark
+def download(server, tmpdir, size=64 * MB):
+    server.state.add_file('bench/download.bin', os.urandom(size))
+    _, elapsed = run_client('download_file', path='bench/download.bin',
+                            output_dir=os.path.join(tmpdir, 'downloads'))
+    return {'download_mb_s': size / MB / elapsed}
+
+
+@benchmark
+def list_tasks(server, tmpdir, tasks=10000):
+    for _ in range(tasks):
+        server.state.add_task(state='FINISHED')
+    count, elapsed = run_client('list_all_tasks')
+    assert count >= tasks
+    return {'list_tasks_per_s': count / elapsed}
+
+
+@benchmark
+def task_polling(server, tmpdir, tasks=20):
+    server.state.add_model('bench', 'model')
+    polls_before = server.state.requests['get_task']
+    run_client('predict_and_wait', model='bench/model', input_path='bench/small/',
+               tasks=tasks)
+    polls = server.state.requests['get_task'] - polls_before
+    return {'polls_per_task': polls / tasks}
+
+
+def measure_import_time(runs=5):
+    code = ('import time; t = time.perf_counter(); import dymaxionlabs; '
+            'print(time.perf_counter() - t)')
+    times = [
+        float(subprocess.check_output([sys.executable, '-c', code], cwd=ROOT_DIR))
+        for _ in range(runs)
+    ]
+    return {'import_time_s': min(times)}
+
+
+def measure_peak_rss():
+    """Returns the highest peak RSS of client subprocesses.  The fake API
+    server keeps all files in memory, so the RSS of this process would not
+    reflect the memory used by the client."""
+    if not _client_rss:
+        return {}
+    return {'peak_rss_mb': max(_client_rss)}
+
+
+def _peak_rss_mb():
+    # On Linux, ru_maxrss is inherited from the parent process across
+    # exec, so it would include the memory of the fake API server
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024 / MB
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux, but in bytes on macOS
+    if sys.platform != 'darwin':
+        rss *= 1024
+    return rss / MB
+
+
+def run(selected=None):
+    from dymaxionlabs.testing import FakeAPIServer
+
+    results = {}
+    with FakeAPIServer() as server, tempfile.TemporaryDirectory() as tmpdir:
+        os.environ['DYM_API_URL'] = server.url
+        os.environ.setdefault('DYM_API_KEY', 'benchmark')
+        for func in benchmarks:
+            if selected and func.__name__ not in selected:
+                continue
+            print(f'Running {func.__name__}...', file=sys.stderr)
+            results.update(func(server, tmpdir))
+    results.update(measure_peak_rss())
+    if not selected or 'import_time' in selected:
+        results.update(measure_import_time())
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Prints results against baseline and returns a list of regressed
+    metrics"""
+    regressions = []
+    for name, value in results.items():
+        base = baseline.get(name)
+        line = f'{name:<24} {value:>12.3f}'
+        if base:
+            change = (value - base) / base
+            higher_is_better = METRICS.get(name, True)
+            regressed = -change > tolerance if higher_is_better else change > tolerance
+            line = f'{line} {base:>12.3f} {change:>+8.1%}'
+            if regressed:
+                line = f'{line}  REGRESSION'
+                regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('benchmarks', nargs='*',
+                        help='benchmarks to run (default: all)')
+    parser.add_argument('--baseline', default=BASELINE_PATH,
+                        help='path to baseline results file')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed relative regression (default: %(default)s)')
+    parser.add_argument('--client', nargs=2, metavar=('NAME', 'KWARGS'),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.client:
+        return _run_client_here(*args.client)
+
+    results = run(args.benchmarks)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(f'{"metric":<24} {"current":>12} {"baseline":>12} {"change":>8}')
+    regressions = compare(results, baseline, args.tolerance)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+    elif regressions:
+        sys.exit(f'Performance regressions found: {", ".join(regressions)}')
+
+
+if __name__ == '__main__':
+    main()
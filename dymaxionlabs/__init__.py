@@ -7,18 +7,23 @@ Package to integrate the DymaxionLabs's funcionality:
  - Download results
 
 """
-import os
-from pkg_resources import get_distribution, DistributionNotFound
-
-from . import files
-from . import models
-from . import utils
+import importlib
+from importlib.metadata import PackageNotFoundError, version
 
 try:
     # Change here if project is renamed and does not equal the package name
     dist_name = __name__
-    __version__ = get_distribution(dist_name).version
-except DistributionNotFound:
+    __version__ = version(dist_name)
+except PackageNotFoundError:
     __version__ = 'unknown'
 finally:
-    del get_distribution, DistributionNotFound
+    del version, PackageNotFoundError
+
+# Submodules are imported on first access, to keep startup fast
+_SUBMODULES = ('files', 'models', 'tasks', 'utils')
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{name}', __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,274 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+DEFAULT_DOWNLOAD_CACHE_SIZE = 10 * 2**30  # 10 GB
+
+# Metadata fields that identify a version of a file in storage
+FINGERPRINT_FIELDS = ('size', 'generation', 'updated', 'etag', 'md5Hash',
+                      'md5_hash', 'crc32c')
+
+
+class DiskCache:
+    """A simple key-value cache of JSON-serializable values stored on disk.
+
+    Each entry is stored in its own file and written atomically, so a cache
+    directory can be safely shared between processes on the same host.
+
+    :param str path: cache directory. It will be created if it does not exist.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _entry_path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, f'{digest}.json')
+
+    def get(self, key, ttl=None):
+        """Gets the value stored for ``key``.
+
+        :param str key: entry key
+        :param float ttl: if set, ignore entries older than ``ttl`` seconds
+        :returns: stored value, or None if not found or expired
+
+        """
+        try:
+            with open(self._entry_path(key)) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return
+        if entry.get('key') != key:
+            return
+        if ttl is not None and time.time() - entry['stored_at'] > ttl:
+            return
+        return entry['value']
+
+    def set(self, key, value):
+        """Stores ``value`` for ``key``, replacing any previous value.
+
+        :param str key: entry key
+        :param value: any JSON-serializable value
+
+        """
+        entry = dict(key=key, stored_at=time.time(), value=value)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._entry_path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def delete(self, key):
+        """Removes the entry for ``key``, if any.
+
+        :param str key: entry key
+
+        """
+        try:
+            os.unlink(self._entry_path(key))
+        except FileNotFoundError:
+            pass
+
+    def __repr__(self):
+        return f"<dymaxionlabs.cache.DiskCache path=\"{self.path}\">"
+
+
+class DownloadCache:
+    """A cache of downloaded files, shared between processes on the same host.
+
+    Entries are keyed by the path of a file in storage and a fingerprint of
+    its version, taken from its metadata (size, update time, etag and
+    checksums), so a file changed in storage is downloaded again.  Files
+    without an update time, etag or checksum in their metadata are not
+    cached.
+
+    Downloaded files are hard-linked into the cache on a miss, and cached
+    files are hard-linked into their destination on a hit, so cached data is
+    not written twice.  Cached files are read-only, to prevent modifying them
+    through a link, so linked files are read-only both on a miss and on a
+    hit.  Files are copied instead if linking is not possible (e.g. across
+    file systems) or ``link`` is False, and copies are writable.
+
+    When the total size of cached files exceeds ``max_size``, least recently
+    used entries are removed.  Entries are added with an atomic rename, and
+    eviction holds a lock file, so a cache directory can be safely shared
+    between processes.
+
+    :param str path: cache directory. It will be created if it does not exist.
+    :param int max_size: maximum total size of cached files, in bytes
+    :param bool link: hard-link cached files instead of copying them
+
+    """
+
+    def __init__(self, path, max_size=DEFAULT_DOWNLOAD_CACHE_SIZE, link=True):
+        self.path = path
+        self.max_size = max_size
+        self.link = link
+        os.makedirs(path, exist_ok=True)
+
+    def _entry_path(self, key, metadata):
+        fingerprint = fingerprint_metadata(metadata)
+        if fingerprint is None:
+            return
+        digest = hashlib.sha1(f'{key}\n{fingerprint}'.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, f'{digest}.data')
+
+    def get(self, key, metadata, output_file):
+        """Copies the cached file for ``key`` and ``metadata`` into
+        ``output_file``, if any.
+
+        :param str key: entry key, usually the path of the file in storage
+        :param dict metadata: file metadata
+        :param str output_file: destination path
+        :returns: True on a cache hit, False otherwise
+        :rtype: bool
+
+        """
+        entry_path = self._entry_path(key, metadata)
+        if entry_path is None:
+            return False
+        try:
+            # Mark entry as recently used
+            os.utime(entry_path)
+            self._place(entry_path, output_file)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, key, metadata, input_file):
+        """Stores ``input_file`` for ``key`` and ``metadata``, and evicts old
+        entries if the cache is over its size budget.
+
+        The file is hard-linked into the cache, or copied if linking is not
+        possible.  A linked ``input_file`` becomes read-only, like the
+        cached file.
+
+        :param str key: entry key, usually the path of the file in storage
+        :param dict metadata: file metadata
+        :param str input_file: path of the downloaded file
+
+        """
+        entry_path = self._entry_path(key, metadata)
+        if entry_path is None or os.path.getsize(input_file) > self.max_size:
+            return
+        tmp_path = os.path.join(self.path, f'{uuid.uuid4().hex}.tmp')
+        try:
+            if not (self.link and _link(input_file, tmp_path)):
+                shutil.copyfile(input_file, tmp_path)
+            os.chmod(tmp_path, 0o444)
+            os.replace(tmp_path, entry_path)
+        except BaseException:
+            if os.path.lexists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self.evict()
+
+    def _place(self, entry_path, output_file):
+        if os.path.lexists(output_file):
+            os.unlink(output_file)
+        if self.link and _link(entry_path, output_file):
+            return
+        output_dir = os.path.dirname(output_file) or '.'
+        tmp_path = os.path.join(output_dir, f'.{uuid.uuid4().hex}.tmp')
+        try:
+            shutil.copyfile(entry_path, tmp_path)
+            os.replace(tmp_path, output_file)
+        except BaseException:
+            if os.path.lexists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @property
+    def size(self):
+        """Total size of cached files, in bytes"""
+        return sum(size for _, _, size in self._entries())
+
+    def _entries(self):
+        res = []
+        for name in os.listdir(self.path):
+            if not name.endswith('.data'):
+                continue
+            try:
+                st = os.stat(os.path.join(self.path, name))
+            except FileNotFoundError:
+                continue
+            res.append((st.st_mtime, name, st.st_size))
+        return res
+
+    @contextmanager
+    def _lock(self):
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(os.path.join(self.path, '.lock'), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def evict(self):
+        """Removes least recently used entries until the total size of cached
+        files is within ``max_size``"""
+        with self._lock():
+            entries = sorted(self._entries())
+            total = sum(size for _, _, size in entries)
+            for _, name, size in entries:
+                if total <= self.max_size:
+                    break
+                try:
+                    os.unlink(os.path.join(self.path, name))
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def clear(self):
+        """Removes all entries"""
+        with self._lock():
+            for _, name, _ in self._entries():
+                try:
+                    os.unlink(os.path.join(self.path, name))
+                except FileNotFoundError:
+                    pass
+
+    def __repr__(self):
+        return f"<dymaxionlabs.cache.DownloadCache path=\"{self.path}\">"
+
+
+def _link(src, dst):
+    """Hard-links ``src`` to ``dst``.  Returns False if linking is not
+    possible."""
+    try:
+        os.link(src, dst)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        return False
+    return True
+
+
+def fingerprint_metadata(metadata):
+    """Returns a string that identifies the version of a file from its
+    ``metadata``, or None if metadata has no version information"""
+    if not isinstance(metadata, dict):
+        return
+    fields = [(k, metadata[k]) for k in FINGERPRINT_FIELDS if metadata.get(k) is not None]
+    # Size alone does not tell versions apart
+    if not any(k != 'size' for k, _ in fields):
+        return
+    return json.dumps(fields, sort_keys=True, default=str)
@@ -0,0 +1,161 @@
+"""
+Integrity checks of transferred files.
+
+Checksums are computed incrementally over the bytes already flowing
+through uploads and downloads, and compared against hashes reported by the
+server, either in the file ``metadata`` (``md5Hash`` and ``crc32c``, base64
+encoded as in Google Cloud Storage) or in the ``X-Goog-Hash`` and
+``Content-MD5`` headers of a download response.
+
+CRC32C is only computed if ``google-crc32c`` is installed.
+
+"""
+import base64
+import binascii
+import hashlib
+import io
+
+from .utils import ChecksumMismatchError
+
+try:
+    import google_crc32c
+except ImportError:  # pragma: no cover
+    google_crc32c = None
+
+
+class Checksums:
+    """Computes MD5 and CRC32C checksums incrementally.
+
+    :param iterable algorithms: algorithms to compute (default: all
+        available)
+
+    """
+
+    def __init__(self, algorithms=None):
+        if algorithms is None:
+            algorithms = ('md5', 'crc32c') if google_crc32c else ('md5', )
+        self._hashes = {}
+        for algorithm in algorithms:
+            if algorithm == 'md5':
+                self._hashes[algorithm] = hashlib.md5()
+            elif algorithm == 'crc32c' and google_crc32c:
+                self._hashes[algorithm] = google_crc32c.Checksum()
+
+    def update(self, data):
+        for value in self._hashes.values():
+            value.update(data)
+
+    def digests(self):
+        """Returns a dict of base64 encoded digests, by algorithm"""
+        return {
+            algorithm: base64.b64encode(value.digest()).decode('ascii')
+            for algorithm, value in self._hashes.items()
+        }
+
+    def verify(self, expected, path=None):
+        """Compares computed checksums against ``expected`` ones.
+
+        :param dict expected: base64 encoded digests, by algorithm
+        :param str path: file path, for error messages
+        :raises: ChecksumMismatchError if any checksum does not match
+        :returns: True if any checksum was compared, False if none could be
+        :rtype: bool
+
+        """
+        verified = False
+        for algorithm, actual in self.digests().items():
+            if algorithm in expected:
+                if expected[algorithm] != actual:
+                    raise ChecksumMismatchError(path, algorithm,
+                                                expected[algorithm], actual)
+                verified = True
+        return verified
+
+
+class HashingReader(io.RawIOBase):
+    """Wraps a seekable binary ``stream``, updating ``checksums`` with bytes
+    read from it.
+
+    Bytes read again after seeking back (e.g. when a chunk is retried) are
+    only hashed once.
+
+    """
+
+    def __init__(self, stream, checksums):
+        self.stream = stream
+        self.checksums = checksums
+        self._hashed_up_to = stream.tell()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.stream.tell()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self.stream.seek(offset, whence)
+
+    def read(self, size=-1):
+        start = self.stream.tell()
+        data = self.stream.read(size)
+        end = start + len(data)
+        if start <= self._hashed_up_to < end:
+            self.checksums.update(data[self._hashed_up_to - start:])
+            self._hashed_up_to = end
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+def checksums_from_metadata(metadata):
+    """Gets expected checksums from file ``metadata``.
+
+    :param dict metadata: file metadata
+    :returns: base64 encoded digests, by algorithm
+    :rtype: dict
+
+    """
+    if not isinstance(metadata, dict):
+        return {}
+    res = {}
+    md5 = metadata.get('md5Hash') or metadata.get('md5_hash')
+    if md5:
+        res['md5'] = _normalize_md5(md5)
+    crc32c = metadata.get('crc32c')
+    if crc32c:
+        res['crc32c'] = crc32c
+    return res
+
+
+def checksums_from_headers(headers):
+    """Gets expected checksums from HTTP response ``headers``.
+
+    :param dict headers: response headers
+    :returns: base64 encoded digests, by algorithm
+    :rtype: dict
+
+    """
+    res = {}
+    for part in headers.get('X-Goog-Hash', '').split(','):
+        algorithm, _, value = part.strip().partition('=')
+        if algorithm in ('md5', 'crc32c') and value:
+            res[algorithm] = value
+    if 'Content-MD5' in headers and 'md5' not in res:
+        res['md5'] = _normalize_md5(headers['Content-MD5'])
+    return res
+
+
+def _normalize_md5(value):
+    """Returns an MD5 digest as base64, converting it from hex if needed"""
+    if len(value) == 32:
+        try:
+            return base64.b64encode(binascii.unhexlify(value)).decode('ascii')
+        except binascii.Error:
+            pass
+    return value
@@ -0,0 +1,364 @@
+"""
+Command-line interface to the Dymaxion Labs Platform.
+
+Paths in storage are prefixed with ``dym:``, local paths are not::
+
+    dymaxionlabs cp -r ./images/ dym:images/
+    dymaxionlabs ls -l 'dym:images/*.tif'
+    dymaxionlabs predict dym/pools dym:images/ --wait --output-dir ./results
+    dymaxionlabs rm 'dym:tmp/*' --dry-run
+
+Listings of large trees can be split by the names of the directories
+matched by the first ``*`` of a pattern, and listed concurrently::
+
+    dymaxionlabs ls 'dym:tiles/*/*.tif' --prefix 0 --prefix 1 --prefix 2
+
+Credentials and API URL are read from the ``DYM_API_KEY`` and
+``DYM_API_URL`` environment variables, as in the rest of the package.
+
+Modules are only imported when a command needs them, to keep startup fast.
+
+"""
+import argparse
+import os
+import sys
+
+from . import __version__
+
+REMOTE_PREFIX = 'dym:'
+
+_GLOB_CHARS = '*?['
+
+
+def is_remote(path):
+    return path.startswith(REMOTE_PREFIX)
+
+
+def strip_remote(path):
+    return path[len(REMOTE_PREFIX):] if is_remote(path) else path
+
+
+def main(argv=None):
+    """Runs the command-line interface.
+
+    :param list argv: arguments (default: ``sys.argv[1:]``)
+    :returns: exit status
+    :rtype: int
+
+    """
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    if not getattr(args, 'func', None):
+        parser.print_help()
+        return 2
+    try:
+        return args.func(args) or 0
+    except KeyboardInterrupt:
+        return 130
+    except Exception as err:
+        _error(err)
+        return 1
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(
+        prog='dymaxionlabs',
+        description='Command-line interface to the Dymaxion Labs Platform')
+    parser.add_argument('--version', action='version', version=__version__)
+    subparsers = parser.add_subparsers(title='commands')
+
+    def add_listing_arguments(p):
+        p.add_argument('--prefix', dest='prefixes', action='append', default=None,
+                       metavar='NAME',
+                       help='list each directory NAME matched by the first * of '
+                       'a pattern separately and concurrently (can be repeated)')
+
+    def add_transfer_arguments(p):
+        p.add_argument('-j', '--jobs', type=int, default=None,
+                       help='number of concurrent transfers')
+        p.add_argument('-P', '--processes', type=int, default=None,
+                       help='run transfers in this many processes, each one '
+                       'with --jobs concurrent transfers')
+        p.add_argument('--progress', default=None,
+                       help='progress reporter: tqdm, logging or none')
+        p.add_argument('--no-verify', dest='verify', action='store_false',
+                       help='do not verify checksums of transferred files')
+
+    p = subparsers.add_parser('cp', help='copy files to or from storage')
+    p.add_argument('sources', nargs='+', metavar='SRC')
+    p.add_argument('destination', metavar='DST')
+    p.add_argument('-r', '--recursive', action='store_true',
+                   help='copy directories recursively')
+    p.add_argument('-n', '--no-clobber', dest='skip_existing', action='store_true',
+                   help='skip files that already exist with the same size')
+    add_transfer_arguments(p)
+    add_listing_arguments(p)
+    p.set_defaults(func=cmd_cp)
+
+    p = subparsers.add_parser(
+        'sync', help='copy a directory recursively, skipping existing files')
+    p.add_argument('source', metavar='SRC')
+    p.add_argument('destination', metavar='DST')
+    add_transfer_arguments(p)
+    add_listing_arguments(p)
+    p.set_defaults(func=cmd_sync)
+
+    p = subparsers.add_parser('ls', help='list files in storage')
+    p.add_argument('pattern', nargs='?', default=f'{REMOTE_PREFIX}*',
+                   metavar='PATTERN')
+    p.add_argument('-l', '--long', action='store_true', help='show file sizes')
+    p.add_argument('-j', '--jobs', type=int, default=None,
+                   help='number of directories listed concurrently with --prefix')
+    add_listing_arguments(p)
+    p.set_defaults(func=cmd_ls)
+
+    p = subparsers.add_parser('rm', help='delete files in storage')
+    p.add_argument('paths', nargs='+', metavar='PATH')
+    p.add_argument('-j', '--jobs', type=int, default=None,
+                   help='number of concurrent deletions')
+    p.add_argument('--dry-run', action='store_true',
+                   help='only show which files would be deleted')
+    add_listing_arguments(p)
+    p.set_defaults(func=cmd_rm)
+
+    p = subparsers.add_parser('predict', help='start a prediction task')
+    p.add_argument('model', metavar='OWNER/MODEL')
+    p.add_argument('input_dir', metavar='INPUT_DIR')
+    p.add_argument('--version', dest='model_version', default=None,
+                   help='model version (default: latest)')
+    p.add_argument('-p', '--param', action='append', default=[],
+                   metavar='KEY=VALUE', help='extra prediction parameter')
+    p.add_argument('--wait', action='store_true',
+                   help='wait until the task finishes')
+    p.add_argument('-o', '--output-dir', default=None,
+                   help='download artifacts to this directory (implies --wait)')
+    p.add_argument('--interval', type=float, default=5,
+                   help='seconds between status checks')
+    p.add_argument('--timeout', type=float, default=60 * 60,
+                   help='seconds to wait for the task')
+    p.add_argument('--progress', default=None,
+                   help='progress reporter: tqdm, logging or none')
+    p.set_defaults(func=cmd_predict)
+
+    p = subparsers.add_parser('wait', help='wait until tasks finish')
+    p.add_argument('task_ids', nargs='+', metavar='TASK_ID')
+    p.add_argument('--interval', type=float, default=5,
+                   help='seconds between status checks')
+    p.add_argument('--timeout', type=float, default=60 * 60,
+                   help='seconds to wait for tasks')
+    p.set_defaults(func=cmd_wait)
+
+    return parser
+
+
+def cmd_cp(args):
+    remote_dst = is_remote(args.destination)
+    if any(is_remote(src) == remote_dst for src in args.sources):
+        raise ValueError(
+            f"either sources or destination must be in storage (prefixed with '{REMOTE_PREFIX}')")
+    if remote_dst:
+        return _upload(args)
+    return _download(args)
+
+
+def cmd_sync(args):
+    args.sources = [args.source]
+    args.recursive = True
+    args.skip_existing = True
+    return cmd_cp(args)
+
+
+def _upload(args):
+    from .files import File
+
+    dst = strip_remote(args.destination)
+    to_dir = dst == '' or dst.endswith('/') or len(args.sources) > 1
+    items = []
+    for src in args.sources:
+        if os.path.isdir(src):
+            if not args.recursive:
+                raise ValueError(f"{src} is a directory (use -r to copy it)")
+            prefix = _join(dst, os.path.basename(os.path.normpath(src))) \
+                if to_dir and not src.endswith('/') else dst
+            for root, _, names in os.walk(src):
+                for name in sorted(names):
+                    path = os.path.join(root, name)
+                    rel = os.path.relpath(path, src).replace(os.sep, '/')
+                    items.append((path, _join(prefix, rel)))
+        else:
+            items.append((src, _join(dst, os.path.basename(src)) if to_dir else dst))
+
+    if args.processes:
+        from . import parallel
+
+        report = parallel.upload_many(items, **_transfer_kwargs(args))
+    else:
+        report = File.upload_many(items, **_transfer_kwargs(args))
+    return _print_report(report, lambda file: file.path)
+
+
+def _download(args):
+    from .files import File
+    from .utils import DEFAULT_MAX_WORKERS
+
+    dst = args.destination
+    items = []
+    for src in args.sources:
+        pattern = strip_remote(src)
+        if args.recursive and not any(c in pattern for c in _GLOB_CHARS):
+            pattern = _join(pattern, '**')
+        if any(c in pattern for c in _GLOB_CHARS):
+            prefix = _literal_prefix(pattern)
+            for file in File.iter_all(pattern,
+                                      parallelism=args.jobs or DEFAULT_MAX_WORKERS,
+                                      prefixes=args.prefixes):
+                rel = file.path[len(prefix):] if args.recursive else file.name
+                items.append((file, os.path.join(dst, *rel.split('/'))))
+        else:
+            file = File.get(pattern)
+            output_file = dst
+            if os.path.isdir(dst) or dst.endswith(os.sep) or len(args.sources) > 1:
+                output_file = os.path.join(dst, file.name)
+            items.append((file, output_file))
+
+    if args.processes:
+        from . import parallel
+
+        report = parallel.download_many(items, **_transfer_kwargs(args))
+    else:
+        report = File.download_many(items, **_transfer_kwargs(args))
+    return _print_report(report, lambda path: path)
+
+
+def cmd_ls(args):
+    from .files import File
+    from .utils import DEFAULT_MAX_WORKERS
+
+    for file in File.iter_all(strip_remote(args.pattern),
+                              parallelism=args.jobs or DEFAULT_MAX_WORKERS,
+                              prefixes=args.prefixes):
+        if args.long:
+            size = file.metadata.get('size', '') if isinstance(file.metadata, dict) else ''
+            print(f"{size:>12}  {REMOTE_PREFIX}{file.path}")
+        else:
+            print(f"{REMOTE_PREFIX}{file.path}")
+
+
+def cmd_rm(args):
+    from .files import File
+    from .utils import DEFAULT_MAX_WORKERS
+
+    max_workers = args.jobs or DEFAULT_MAX_WORKERS
+    report = {}
+    for path in args.paths:
+        path = strip_remote(path)
+        files = path if any(c in path for c in _GLOB_CHARS) else [path]
+        report.update(File.delete_many(files, max_workers=max_workers,
+                                       dry_run=args.dry_run, prefixes=args.prefixes))
+    failed = 0
+    for path, err in report.items():
+        if err:
+            failed += 1
+            _error(f"{REMOTE_PREFIX}{path}: {err}")
+        else:
+            print(f"{'would delete' if args.dry_run else 'deleted'} {REMOTE_PREFIX}{path}")
+    return 1 if failed else 0
+
+
+def cmd_predict(args):
+    from .models import Model
+
+    model = Model.get(args.model, version=args.model_version)
+    task = model.predict(strip_remote(args.input_dir), **_parse_params(args.param))
+    print(task.id)
+    if not (args.wait or args.output_dir):
+        return 0
+    if not _wait_for(task, args.interval, args.timeout):
+        return 1
+    if args.output_dir:
+        path = task.download_artifacts(args.output_dir, progress=args.progress)
+        print(path if isinstance(path, str) else '\n'.join(path))
+    return 0
+
+
+def cmd_wait(args):
+    from .tasks import Task
+
+    tasks = [Task.get(task_id) for task_id in args.task_ids]
+    ok = all([_wait_for(task, args.interval, args.timeout) for task in tasks])
+    return 0 if ok else 1
+
+
+def _wait_for(task, interval, timeout):
+    """Waits for ``task`` and reports its final state.  Returns True if the
+    task finished successfully."""
+    task.wait_until_finished(interval=interval, timeout=timeout)
+    if task.is_running():
+        _error(f"task {task.id}: timed out ({task.state})")
+        return False
+    if task.state != 'FINISHED':
+        _error(f"task {task.id}: {task.state}")
+        return False
+    print(f"task {task.id}: {task.state}")
+    return True
+
+
+def _transfer_kwargs(args):
+    from .utils import DEFAULT_MAX_WORKERS
+
+    kwargs = dict(skip_existing=args.skip_existing,
+                  progress=args.progress,
+                  verify=args.verify)
+    if args.processes:
+        from .parallel import DEFAULT_THREADS_PER_PROCESS
+
+        kwargs.update(processes=args.processes,
+                      threads_per_process=args.jobs or DEFAULT_THREADS_PER_PROCESS)
+    else:
+        kwargs.update(max_workers=args.jobs or DEFAULT_MAX_WORKERS)
+    return kwargs
+
+
+def _print_report(report, format_result):
+    failed = 0
+    for src, result in report.items():
+        if isinstance(result, Exception):
+            failed += 1
+            _error(f"{src}: {result}")
+        else:
+            print(f"{src} -> {format_result(result)}")
+    return 1 if failed else 0
+
+
+def _parse_params(params):
+    res = {}
+    for param in params:
+        key, sep, value = param.partition('=')
+        if not sep:
+            raise ValueError(f"invalid parameter {param!r}, expected KEY=VALUE")
+        res[key] = value
+    return res
+
+
+def _literal_prefix(pattern):
+    """Returns the leading path components of ``pattern`` without
+    wildcards, ending with a slash"""
+    parts = pattern.split('/')
+    for i, part in enumerate(parts):
+        if any(c in part for c in _GLOB_CHARS):
+            break
+    return ''.join(f'{part}/' for part in parts[:i])
+
+
+def _join(prefix, path):
+    if not prefix:
+        return path
+    return f"{prefix.rstrip('/')}/{path}"
+
+
+def _error(message):
+    print(f"dymaxionlabs: error: {message}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
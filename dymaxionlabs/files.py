@@ -1,14 +1,34 @@
 import io
 import mimetypes
 import os
-
-from tqdm import tqdm
-
-from .upload import CustomResumableUpload
-from .utils import fetch_from_list_request, request, NotFoundError
+import queue
+import re
+import threading
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+import requests
+
+from .cache import DEFAULT_DOWNLOAD_CACHE_SIZE, DownloadCache
+from .checksums import (Checksums, HashingReader, checksums_from_headers,
+                        checksums_from_metadata)
+from .progress import AggregateProgress, get_progress
+from .remote import (DEFAULT_BLOCK_SIZE, DEFAULT_CACHE_BLOCKS,
+                     DEFAULT_READ_AHEAD, RemoteFile)
+from .upload import CustomResumableUpload, IterableStream
+from .utils import (DEFAULT_MAX_WORKERS, DOWNLOAD_CHUNK_SIZE,
+                    NO_EXTRA_ATTRIBUTES, ChecksumMismatchError, EntityList,
+                    NotFoundError, get_api_url, get_cache_dir,
+                    iter_list_request, request)
 
 MIN_SIZE_RESUMABLE_UPLOAD = 2**20  # 1MB
 DEFAULT_CHUNK_SIZE = 2**20  # 1MB
+LISTING_QUEUE_SIZE = 10000  # files listed but not yet consumed
+TRANSFER_RETRIES = 2  # retries of transfers that fail integrity checks
+
+_GLOB_CHARS_RE = re.compile(r'[*?\[]')
+_DONE = object()
 
 
 class File:
@@ -24,6 +44,8 @@ class File:
 
     """
 
+    __slots__ = ('name', 'path', 'metadata', 'tiling_job', 'extra_attributes')
+
     base_path = '/storage'
 
     def __init__(self, name, path, metadata, **extra_attributes):
@@ -31,10 +53,10 @@ class File:
         self.path = path
         self.metadata = metadata
         self.tiling_job = None
-        self.extra_attributes = extra_attributes
+        self.extra_attributes = extra_attributes or NO_EXTRA_ATTRIBUTES
 
     @classmethod
-    def all(cls, path=""):
+    def all(cls, path="", columnar=False):
         """Fetches all files found in ``path``.
 
         Glob patterns are allowed, to search recursively in directories::
@@ -42,18 +64,94 @@ class File:
             File.all("foo/b*/images/*.tif")
             #=> [<dymaxionlabs.file.File name="foo/bar/images/01.tif">, ...]
 
+        For large listings, use ``columnar=True`` to get a compact
+        :class:`FileList` instead, which builds :class:`File` instances only
+        on access and can be exported to pandas or Arrow.
+
         :param str path: path glob pattern (default: "")
+        :param bool columnar: return a :class:`FileList` instead of a list
         :returns: a list of :class:`File` of files found in path
-        :rtype: list
+        :rtype: list or FileList
 
         """
         response = request('get',
                            f'{cls.base_path}/files/',
                            params=dict(path=path))
-        if response:
-            return [File(**attrs) for attrs in response]
-        else:
-            return []
+        files = FileList(response or [])
+        return files if columnar else list(files)
+
+    @classmethod
+    def iter_all(cls, path="", parallelism=DEFAULT_MAX_WORKERS, prefixes=None):
+        """Iterates over all files found in ``path``.
+
+        Unlike :meth:`all`, files are yielded while listing is still in
+        progress, and consumers do not have to wait for the whole listing.
+
+        Listing a large tree can be split into partitions, listed
+        ``parallelism`` at a time, by passing the names of the directories
+        matched by the first wildcard component of ``path`` as
+        ``prefixes``.  Each partition is then a listing of a single
+        directory, e.g. ``tiles/*/*.tif`` with ``prefixes=["0", "1"]`` lists
+        ``tiles/0/*.tif`` and ``tiles/1/*.tif``.  Files in directories not
+        included in ``prefixes`` are not listed.  Without ``prefixes``, or
+        if the first wildcard component is not a whole ``*`` directory
+        component, ``path`` is listed with a single request.
+
+        Each partition is fetched in a single response, so memory usage is
+        bounded by the largest partition.  Files are not yielded in any
+        particular order::
+
+            rows = [str(row) for row in range(100)]
+            for file in File.iter_all("tiles/*/*.tif", prefixes=rows):
+                ...
+
+        :param str path: path glob pattern (default: "")
+        :param int parallelism: number of partitions listed concurrently
+        :param list prefixes: directory names to partition the listing by
+        :raises: ValueError if a prefix is not a plain directory name
+        :returns: an iterator of :class:`File`
+        :rtype: iterator
+
+        """
+        partitions = _partition_pattern(path, prefixes)
+        results = queue.Queue(maxsize=LISTING_QUEUE_SIZE)
+        stop = threading.Event()
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def list_partition(pattern):
+            try:
+                for attrs in iter_list_request(f'{cls.base_path}/files/',
+                                               params=dict(path=pattern)):
+                    if not put(attrs):
+                        return
+            except Exception as err:
+                put(err)
+            put(_DONE)
+
+        executor = ThreadPoolExecutor(max_workers=parallelism)
+        try:
+            for pattern in partitions:
+                executor.submit(list_partition, pattern)
+            pending = len(partitions)
+            while pending:
+                item = results.get()
+                if item is _DONE:
+                    pending -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield cls(**item)
+        finally:
+            stop.set()
+            executor.shutdown(wait=False)
 
     @classmethod
     def get(cls, path, raise_error=True):
@@ -88,50 +186,99 @@ class File:
                        params=dict(path=storage_path, size=size))
 
     @classmethod
-    def _resumable_upload(cls, input_path, storage_path, chunk_size):
+    def _resumable_upload(cls, input_path, storage_path, chunk_size, progress=None, verify=True):
+        for attempt in range(TRANSFER_RETRIES + 1):
+            try:
+                with open(input_path, "rb") as stream:
+                    return cls._resumable_upload_stream(
+                        stream,
+                        storage_path,
+                        os.path.getsize(input_path),
+                        chunk_size,
+                        mimetypes.MimeTypes().guess_type(input_path)[0],
+                        name=os.path.basename(input_path),
+                        progress=progress,
+                        verify=verify)
+            except ChecksumMismatchError as err:
+                if attempt == TRANSFER_RETRIES:
+                    raise err
+
+    @classmethod
+    def _resumable_upload_stream(cls, stream, storage_path, total_size, chunk_size,
+                                 content_type, name=None, progress=None, verify=True):
         chunk_size = DEFAULT_CHUNK_SIZE if chunk_size is None else DEFAULT_CHUNK_SIZE * chunk_size
-        total_size = os.path.getsize(input_path)
-        with open(input_path, "rb") as f:
-            stream = io.BytesIO(f.read())
-        metadata = {u'name': os.path.basename(input_path)}
-        res = cls._resumable_url(storage_path, os.path.getsize(input_path))
+        metadata = {u'name': name or os.path.basename(storage_path)}
+        res = cls._resumable_url(storage_path, total_size)
         upload = CustomResumableUpload(res['session_url'], chunk_size)
-        upload.initiate(
-            stream,
-            metadata,
-            mimetypes.MimeTypes().guess_type(input_path)[0],
-            res['session_url'],
-        )
-        with tqdm(total=total_size,
-                  unit_scale=True,
-                  unit='B',
-                  unit_divisor=1024) as pbar:
+        checksums = Checksums()
+        with get_progress(progress, storage_path, total_size) as pbar:
+            upload.initiate(
+                HashingReader(stream, checksums) if verify else stream,
+                metadata,
+                content_type,
+                res['session_url'],
+                total_bytes=total_size,
+                stream_final=total_size is not None,
+            )
             while not upload.finished:
+                bytes_uploaded = upload.bytes_uploaded
                 upload.transmit_next_chunk()
-                pbar.update(chunk_size)
+                pbar.update(upload.bytes_uploaded - bytes_uploaded)
         cls._check_completed_file(storage_path)
-        return cls.get(storage_path)
+        file = cls.get(storage_path)
+        if verify:
+            try:
+                checksums.verify(checksums_from_metadata(file.metadata), storage_path)
+            except ChecksumMismatchError:
+                # Do not leave a corrupted file behind
+                cls._delete(storage_path)
+                raise
+        return file
 
     @classmethod
-    def _upload(cls, input_path, storage_path):
+    def _upload(cls, input_path, storage_path, progress=None, verify=True):
         with open(input_path, 'rb') as fp:
             data = fp.read()
-        response = request(
-            'post',
-            f'{cls.base_path}/upload/',
-            body=dict(path=storage_path),
-            files=dict(file=data),
-        )
-        return File(**response['detail'])
+        return cls._upload_data(data, storage_path, progress=progress, verify=verify)
 
     @classmethod
-    def upload(cls, input_path, storage_path="", chunk_size=None):
+    def _upload_data(cls, data, storage_path, progress=None, verify=True):
+        checksums = Checksums()
+        if verify:
+            checksums.update(data)
+        for attempt in range(TRANSFER_RETRIES + 1):
+            with get_progress(progress, storage_path, len(data)) as pbar:
+                response = request(
+                    'post',
+                    f'{cls.base_path}/upload/',
+                    body=dict(path=storage_path),
+                    files=dict(file=data),
+                )
+                pbar.update(len(data))
+            file = File(**response['detail'])
+            try:
+                if verify:
+                    checksums.verify(checksums_from_metadata(file.metadata), storage_path)
+                return file
+            except ChecksumMismatchError as err:
+                if attempt == TRANSFER_RETRIES:
+                    raise err
+
+    @classmethod
+    def upload(cls, input_path, storage_path="", chunk_size=None, progress=None, verify=True):
         """Uploads a file to storage
 
+        If ``verify`` is True, checksums computed while uploading are compared
+        against the ones reported by storage (see :mod:`dymaxionlabs.checksums`),
+        and the upload is retried if they do not match.
+
         :param str input_path: path of local file to upload
         :param str storage_path: destination path in storage
         :param int chunk_size: size (in MB) of chunks for resumable uploading
+        :param progress: progress reporter (see :mod:`dymaxionlabs.progress`)
+        :param bool verify: check integrity of uploaded file
         :raises: FileNotFoundError
+        :raises: ChecksumMismatchError if uploaded file is corrupted
         :returns: uploaded file
         :rtype: File
 
@@ -140,11 +287,156 @@ class File:
             storage_path = "".join(
                 [storage_path, os.path.basename(input_path)])
         if (os.path.getsize(input_path) > MIN_SIZE_RESUMABLE_UPLOAD):
-            file = cls._resumable_upload(input_path, storage_path, chunk_size)
+            file = cls._resumable_upload(input_path, storage_path, chunk_size, progress=progress, verify=verify)
         else:
-            file = cls._upload(input_path, storage_path)
+            file = cls._upload(input_path, storage_path, progress=progress, verify=verify)
         return file
 
+    @classmethod
+    def upload_stream(cls,
+                      stream,
+                      storage_path,
+                      size=None,
+                      chunk_size=None,
+                      content_type=None,
+                      progress=None,
+                      verify=True):
+        """Uploads data from a file object or an iterable of bytes (like a
+        generator) to storage, without writing it to a local file first::
+
+            File.upload_stream(io.BytesIO(tile), "tiles/0_0.tif")
+            File.upload_stream((json.dumps(f).encode() for f in features),
+                               "results/features.jsonl")
+
+        Small streams are uploaded in a single request.  Larger streams, or
+        streams of unknown size, are uploaded in chunks, keeping only one
+        chunk in memory at a time.
+
+        :param stream: binary file object, or iterable of bytes
+        :param str storage_path: destination path in storage
+        :param int size: size of data in bytes, if known.  For seekable file
+            objects it is computed if not set.
+        :param int chunk_size: size (in MB) of chunks for resumable uploading
+        :param str content_type: MIME type (default: guessed from
+            ``storage_path``)
+        :param progress: progress reporter (see :mod:`dymaxionlabs.progress`)
+        :param bool verify: check integrity of uploaded file.  Streams can
+            not be read again, so a corrupted upload is deleted from storage
+            and not retried.
+        :raises: ChecksumMismatchError if uploaded file is corrupted
+        :returns: uploaded file
+        :rtype: File
+
+        """
+        if storage_path.strip() == "" or storage_path.endswith("/"):
+            raise ValueError("storage_path must be a file path")
+        if size is None and hasattr(stream, 'seekable') and stream.seekable():
+            pos = stream.tell()
+            size = stream.seek(0, io.SEEK_END) - pos
+            stream.seek(pos)
+        reader = IterableStream(stream)
+        if size is None:
+            head = reader.read(MIN_SIZE_RESUMABLE_UPLOAD + 1)
+            reader.seek(0)
+            if len(head) <= MIN_SIZE_RESUMABLE_UPLOAD:
+                size = len(head)
+        if size is not None and size <= MIN_SIZE_RESUMABLE_UPLOAD:
+            return cls._upload_data(reader.read(), storage_path, progress=progress, verify=verify)
+        if content_type is None:
+            content_type = mimetypes.MimeTypes().guess_type(storage_path)[0]
+        return cls._resumable_upload_stream(reader,
+                                            storage_path,
+                                            size,
+                                            chunk_size,
+                                            content_type,
+                                            progress=progress,
+                                            verify=verify)
+
+    @classmethod
+    def upload_many(cls,
+                    items,
+                    max_workers=DEFAULT_MAX_WORKERS,
+                    skip_existing=False,
+                    progress=None,
+                    **kwargs):
+        """Uploads many files to storage concurrently.
+
+        Failing to upload a file does not stop uploading the others.
+
+        :param items: list of ``(input_path, storage_path)`` pairs
+        :param int max_workers: number of concurrent uploads
+        :param bool skip_existing: do not upload files already in storage
+            with the same size, e.g. to resume an interrupted bulk upload
+        :param progress: progress reporter (see :mod:`dymaxionlabs.progress`).
+            Progress of all uploads is reported together.
+        :param dict kwargs: extra arguments for :meth:`upload`
+        :returns: a dict mapping each input path to the uploaded :class:`File`
+            (or the existing one, if skipped), or to the exception raised
+            when uploading it
+        :rtype: dict
+
+        """
+        def upload(item, progress):
+            input_path, storage_path = item
+            if skip_existing:
+                if storage_path.strip() == "" or storage_path.endswith("/"):
+                    storage_path = f"{storage_path}{os.path.basename(input_path)}"
+                file = cls.get(storage_path, raise_error=False)
+                if file and _get_size(file) == os.path.getsize(input_path):
+                    return file
+            return cls.upload(input_path, storage_path, progress=progress, **kwargs)
+
+        return _run_many(upload, items, lambda item: item[0], max_workers,
+                         get_progress(progress, 'upload'))
+
+    @classmethod
+    def download_many(cls,
+                      items,
+                      max_workers=DEFAULT_MAX_WORKERS,
+                      skip_existing=False,
+                      progress=None,
+                      **kwargs):
+        """Downloads many files from storage concurrently.
+
+        Failing to download a file does not stop downloading the others.
+
+        :param items: list of ``(file, output_file)`` pairs, where ``file`` is
+            a :class:`File` and ``output_file`` its local destination path
+        :param int max_workers: number of concurrent downloads
+        :param bool skip_existing: do not download files that already exist
+            locally with the same size, e.g. to resume an interrupted bulk
+            download
+        :param progress: progress reporter (see :mod:`dymaxionlabs.progress`).
+            Progress of all downloads is reported together.
+        :param dict kwargs: extra arguments for :meth:`download`
+        :returns: a dict mapping each file path in storage to its local path,
+            or to the exception raised when downloading it
+        :rtype: dict
+
+        """
+        def download(item, progress):
+            file, output_file = item
+            if skip_existing and os.path.exists(output_file) and \
+                    _get_size(file) == os.path.getsize(output_file):
+                return output_file
+            output_dir = os.path.dirname(output_file)
+            if output_dir:
+                os.makedirs(output_dir, exist_ok=True)
+            return cls._download(file.path,
+                                 output_file,
+                                 progress=progress,
+                                 metadata=file.metadata,
+                                 **kwargs)
+
+        return _run_many(download, items, lambda item: item[0].path,
+                         max_workers, get_progress(progress, 'download'))
+
+    @classmethod
+    def _delete(cls, path):
+        request('delete',
+                f'{cls.base_path}/file/',
+                params=dict(path=path))
+
     def delete(self):
         """Deletes the file in storage.
 
@@ -152,29 +444,269 @@ class File:
         :rtype: bool
 
         """
-        request('delete',
-                f'{self.base_path}/file/',
-                params=dict(path=self.path))
+        self._delete(self.path)
         return True
 
-    def download(self, output_dir="."):
+    @classmethod
+    def delete_many(cls, files, max_workers=DEFAULT_MAX_WORKERS, dry_run=False,
+                    prefixes=None):
+        """Deletes many files in storage concurrently.
+
+        ``files`` can be a glob pattern, which is expanded with
+        :meth:`iter_all`, or a list of :class:`File` or paths.  Failing to
+        delete a file does not stop deleting the others::
+
+            report = File.delete_many("tmp/tiles/*.tif", max_workers=32)
+            failed = {path: err for path, err in report.items() if err}
+
+        :param files: glob pattern, or list of files or paths to delete
+        :param int max_workers: number of concurrent deletions, and of
+            partitions listed concurrently if ``prefixes`` is set
+        :param bool dry_run: if True, only report which files would be deleted
+        :param list prefixes: directory names to partition the listing of a
+            glob pattern by (see :meth:`iter_all`)
+        :returns: a dict mapping each path to ``None`` if it was deleted, or
+            to the exception raised when deleting it
+        :rtype: dict
+
+        """
+        if isinstance(files, str):
+            files = cls.iter_all(files, parallelism=max_workers, prefixes=prefixes)
+        paths = (f.path if isinstance(f, File) else f for f in files)
+        if dry_run:
+            return {path: None for path in paths}
+
+        return _run_many(lambda path, progress: cls._delete(path), paths,
+                         lambda path: path, max_workers, get_progress(False))
+
+    @classmethod
+    def _download(cls, path, output_file, progress=None, verify=True, metadata=None,
+                  cache=None):
+        download_cache = _get_download_cache(cache)
+        key = _get_download_cache_key(path)
+        if download_cache and download_cache.get(key, metadata, output_file):
+            return output_file
+        output_file = cls._fetch(path, output_file, progress=progress,
+                                 verify=verify, metadata=metadata)
+        if download_cache:
+            download_cache.put(key, metadata, output_file)
+        return output_file
+
+    @classmethod
+    def _fetch(cls, path, output_file, progress=None, verify=True, metadata=None):
+        for attempt in range(TRANSFER_RETRIES + 1):
+            response = request('get',
+                               f'{cls.base_path}/download/',
+                               params=dict(path=path),
+                               binary=True,
+                               stream=True)
+            try:
+                return _write_response(response,
+                                       output_file,
+                                       get_progress(progress, path),
+                                       verify=verify,
+                                       metadata=metadata)
+            except (ChecksumMismatchError, requests.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError) as err:
+                if attempt == TRANSFER_RETRIES:
+                    raise err
+
+    def download(self, output_dir=".", progress=None, verify=True, cache=None):
         """Downloads the file and stores it on ``output_dir``.
 
         If ``output_dir`` does not exist, it will be created.
 
+        If the download cache is enabled, either with ``cache=True`` or by
+        setting the ``DYM_DOWNLOAD_CACHE`` environment variable to ``1``,
+        downloaded files are kept in a cache directory shared between
+        processes, and the same version of a file is not downloaded again
+        (see :class:`dymaxionlabs.cache.DownloadCache`).  Its maximum size in
+        bytes can be set with ``DYM_DOWNLOAD_CACHE_SIZE``.  Downloaded files
+        are hard links to read-only cached files (both when downloaded and
+        when taken from the cache), so copy them before modifying them.
+        They are regular writable files only if linking is not possible,
+        e.g. when the cache is in another file system.
+
+        If ``verify`` is True, the size and checksums computed while
+        downloading are compared against the ones reported by storage (see
+        :mod:`dymaxionlabs.checksums`), and the download is retried if they
+        do not match.
+
         :param str output_dir: directory path where file will be stored
+        :param progress: progress reporter (see :mod:`dymaxionlabs.progress`)
+        :param bool verify: check integrity of downloaded file
+        :param cache: use the download cache.  Can also be a
+            :class:`dymaxionlabs.cache.DownloadCache` instance.
+        :raises: ChecksumMismatchError if downloaded file is corrupted
+        :returns: path to the downloaded file
+        :rtype: str
 
         """
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
-        content = request('get',
-                          f'{self.base_path}/download/',
-                          params=dict(path=self.path),
-                          binary=True,
-                          parse_response=False)
         output_file = os.path.join(output_dir, self.name)
-        with open(output_file, 'wb') as f:
-            f.write(content)
+        return self._download(self.path,
+                              output_file,
+                              progress=progress,
+                              verify=verify,
+                              metadata=self.metadata,
+                              cache=cache)
+
+    def open(self,
+             block_size=DEFAULT_BLOCK_SIZE,
+             cache_blocks=DEFAULT_CACHE_BLOCKS,
+             read_ahead=DEFAULT_READ_AHEAD):
+        """Opens the file for reading, without downloading it.
+
+        Returns a read-only, seekable file object that fetches only the byte
+        ranges being read, in blocks that are cached in memory (see
+        :mod:`dymaxionlabs.remote`).  Useful to read a small part of a large
+        file, like a window of a Cloud-Optimized GeoTIFF::
+
+            with File.get("images/ortho.tif").open() as f:
+                header = f.read(16384)
+
+        :param int block_size: size of blocks fetched and cached, in bytes
+        :param int cache_blocks: maximum number of blocks to keep in cache
+        :param int read_ahead: number of extra blocks fetched on sequential
+            reads
+        :rtype: RemoteFile
+
+        """
+        return RemoteFile(self.path,
+                          size=_get_size(self),
+                          block_size=block_size,
+                          cache_blocks=cache_blocks,
+                          read_ahead=read_ahead)
 
     def __repr__(self):
         return f"<dymaxionlabs.files.File path=\"{self.path}\">"
+
+
+class FileList(EntityList):
+    """A compact list of :class:`File`, stored by columns.
+
+    See :class:`dymaxionlabs.utils.EntityList`.
+
+    """
+
+    entity_class = File
+    fields = ('name', 'path', 'metadata')
+
+
+def _write_response(response, output_file, pbar, verify=True, metadata=None):
+    """Writes the body of a streamed ``response`` into ``output_file``,
+    reporting progress to ``pbar``.
+
+    If ``verify`` is True, checks that the file size and checksums match the
+    ones reported in response headers or, if there are none, in file
+    ``metadata``.
+
+    The body is written to a temporary file, which replaces ``output_file``
+    only once complete and verified.  An existing ``output_file`` (which may
+    be a hard link to a cached file) is never written in place.
+
+    """
+    checksums = Checksums()
+    size = None
+    # Size and hashes refer to the encoded content, if it is encoded
+    encoded = bool(response.headers.get('Content-Encoding'))
+    if response.headers.get('Content-Length') and not encoded:
+        size = int(response.headers['Content-Length'])
+    written = 0
+    tmp_path = os.path.join(os.path.dirname(output_file),
+                            f'.{os.path.basename(output_file)}.{uuid.uuid4().hex[:8]}.part')
+    try:
+        with response, pbar:
+            if size is not None:
+                pbar.set_total(size)
+            with open(tmp_path, 'xb') as f:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    if verify:
+                        checksums.update(chunk)
+                    written += len(chunk)
+                    pbar.update(len(chunk))
+        if verify:
+            if size is not None and written != size:
+                raise ChecksumMismatchError(output_file, 'size', size, written)
+            # Hashes sent with the response describe this exact version of
+            # the file, while ``metadata`` may be stale if the file changed
+            # after it was listed, so it is used only as a fallback.
+            expected = {} if encoded else checksums_from_headers(response.headers)
+            checksums.verify(expected or checksums_from_metadata(metadata), output_file)
+        os.replace(tmp_path, output_file)
+    except BaseException:
+        # Do not leave incomplete or corrupted files behind
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return output_file
+
+
+def _get_download_cache(cache=None):
+    if isinstance(cache, DownloadCache):
+        return cache
+    if cache is None:
+        cache = os.getenv("DYM_DOWNLOAD_CACHE", "0").lower() in ("1", "true", "yes")
+    if cache:
+        max_size = os.getenv("DYM_DOWNLOAD_CACHE_SIZE")
+        return DownloadCache(os.path.join(get_cache_dir(), "downloads"),
+                             max_size=int(max_size) if max_size else DEFAULT_DOWNLOAD_CACHE_SIZE)
+
+
+def _get_download_cache_key(path):
+    return f"{urlparse(get_api_url()).netloc}/{path}"
+
+
+def _get_size(file):
+    """Returns the size in bytes of ``file``, if known"""
+    if isinstance(file.metadata, dict) and 'size' in file.metadata:
+        return int(file.metadata['size'])
+
+
+def _run_many(func, items, key, max_workers, reporter):
+    """Calls ``func(item, progress)`` for each item concurrently, and returns
+    a dict mapping ``key(item)`` to its result or the exception raised.
+    Progress of all calls is aggregated into ``reporter``."""
+    def run(item):
+        try:
+            return key(item), func(item, aggregate)
+        except Exception as err:
+            return key(item), err
+
+    report = {}
+    with AggregateProgress(reporter) as aggregate, \
+            ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for item in items:
+            if len(pending) >= max_workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                report.update(future.result() for future in done)
+            pending.add(executor.submit(run, item))
+        report.update(future.result() for future in wait(pending).done)
+    return report
+
+
+def _partition_pattern(pattern, prefixes=None):
+    """Splits a glob ``pattern`` into one pattern per directory name in
+    ``prefixes``, replacing its first wildcard component.
+
+    The pattern is only split if that component is a whole ``*`` directory
+    component (e.g. ``tiles/*/*.tif``).  Otherwise, it is returned as is.
+
+    """
+    if not prefixes:
+        return [pattern]
+    for prefix in prefixes:
+        if not prefix or '/' in prefix or _GLOB_CHARS_RE.search(prefix):
+            raise ValueError(f"invalid prefix {prefix!r}, expected a directory name")
+    parts = pattern.split('/')
+    for i, part in enumerate(parts):
+        if _GLOB_CHARS_RE.search(part):
+            break
+    else:
+        return [pattern]
+    if part != '*' or i == len(parts) - 1:
+        return [pattern]
+    return ['/'.join(parts[:i] + [prefix] + parts[i + 1:]) for prefix in prefixes]
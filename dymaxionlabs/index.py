@@ -0,0 +1,188 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+from .tasks import Task, TaskList
+from .utils import get_api_key, get_api_url, get_cache_dir, iter_list_request
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    state TEXT,
+    name TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    finished_at TEXT,
+    attributes TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state);
+CREATE INDEX IF NOT EXISTS tasks_name ON tasks (name);
+CREATE INDEX IF NOT EXISTS tasks_created_at ON tasks (created_at);
+CREATE INDEX IF NOT EXISTS tasks_updated_at ON tasks (updated_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class TaskIndex:
+    """A local, persistent index of :class:`Task` records.
+
+    Tasks are stored in a SQLite database keyed by ``id``.  :meth:`sync`
+    only fetches tasks updated since the last sync, so keeping the index
+    up to date is much cheaper than calling :meth:`Task.all` every time::
+
+        index = TaskIndex()
+        index.sync()
+        index.query(state="FAILED", since="2022-06-01")
+        #=> [<dymaxionlabs.tasks.Task id=42 name="..." state="FAILED">, ...]
+
+    :param str path: path to the index database file. By default, it is
+        stored in the cache directory, one per API URL and key.
+
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = _get_default_path()
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+
+    @property
+    def watermark(self):
+        """Most recent ``updated_at`` value seen on the last sync, or
+        ``None`` if the index was never synced."""
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'watermark'").fetchone()
+        return row[0] if row else None
+
+    def sync(self, full=False):
+        """Fetches tasks updated since the last sync and stores them.
+
+        Tasks are listed by most recently updated first, and listing stops
+        at the first task updated before the last sync, so only new pages
+        are fetched even if the API does not support filtering by update
+        time (this requires the API to sort tasks by ``updated_at``).
+
+        :param bool full: if True, fetch all tasks regardless of the watermark
+        :returns: number of tasks added or updated
+        :rtype: int
+
+        """
+        watermark = None if full else self.watermark
+        params = dict(ordering='-updated_at')
+        if watermark:
+            params['updated_at__gte'] = watermark
+        records = []
+        for attrs in iter_list_request(f'{Task.base_path}/', params=params):
+            if watermark and (attrs.get('updated_at') or '') < watermark:
+                # The API does not support filtering by update time
+                logger.warning("API returned tasks updated before %s, "
+                               "stopping sync there", watermark)
+                break
+            records.append(attrs)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO tasks "
+                "(id, state, name, created_at, updated_at, finished_at, attributes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", [(
+                    str(attrs['id']),
+                    attrs.get('state'),
+                    attrs.get('name'),
+                    attrs.get('created_at'),
+                    attrs.get('updated_at'),
+                    attrs.get('finished_at'),
+                    json.dumps(attrs),
+                ) for attrs in records])
+            new_watermark = max(
+                [watermark or ''] +
+                [attrs['updated_at'] for attrs in records if attrs.get('updated_at')])
+            if new_watermark:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) "
+                    "VALUES ('watermark', ?)", (new_watermark, ))
+        return len(records)
+
+    def get(self, id):
+        """Gets a task from the index.
+
+        :param id int: Task id
+        :returns: the specified :class:`Task`, or ``None`` if not indexed
+        :rtype: Task
+
+        """
+        row = self._conn.execute("SELECT attributes FROM tasks WHERE id = ?",
+                                 (str(id), )).fetchone()
+        if row:
+            return Task._from_attributes(**json.loads(row[0]))
+
+    def query(self, state=None, name=None, since=None, until=None,
+              time_field='created_at'):
+        """Queries indexed tasks.
+
+        Timestamps are compared as ISO 8601 strings, as returned by the API.
+
+        :param str state: only tasks in this state
+        :param str name: only tasks with this name
+        :param str since: only tasks with ``time_field`` at or after this time
+        :param str until: only tasks with ``time_field`` before this time
+        :param str time_field: either ``created_at``, ``updated_at`` or
+            ``finished_at``
+        :returns: a list of :class:`Task`, sorted by ``time_field``
+        :rtype: TaskList
+
+        """
+        if time_field not in ('created_at', 'updated_at', 'finished_at'):
+            raise ValueError(f"invalid time_field: {time_field!r}")
+        conditions, args = [], []
+        if state is not None:
+            conditions.append("state = ?")
+            args.append(state)
+        if name is not None:
+            conditions.append("name = ?")
+            args.append(name)
+        if since is not None:
+            conditions.append(f"{time_field} >= ?")
+            args.append(since)
+        if until is not None:
+            conditions.append(f"{time_field} < ?")
+            args.append(until)
+        sql = "SELECT attributes FROM tasks"
+        if conditions:
+            sql = f"{sql} WHERE {' AND '.join(conditions)}"
+        sql = f"{sql} ORDER BY {time_field}"
+        return TaskList(
+            json.loads(row[0]) for row in self._conn.execute(sql, args))
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def __repr__(self):
+        return f"<dymaxionlabs.index.TaskIndex path=\"{self.path}\">"
+
+
+def _get_default_path():
+    account = f'{get_api_url()}|{get_api_key()}'.encode('utf-8')
+    digest = hashlib.sha1(account).hexdigest()[:12]
+    return os.path.join(get_cache_dir(), f'tasks-{digest}.db')
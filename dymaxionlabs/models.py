@@ -1,8 +1,15 @@
 import json
 import os
+import time
+from urllib.parse import urlparse
 
+from .cache import DiskCache
 from .files import File
-from .utils import fetch_from_list_request, request
+from .utils import (NO_EXTRA_ATTRIBUTES, fetch_from_list_request, get_api_url,
+                    get_cache_dir, request, retry_on_throttle)
+
+DEFAULT_MAX_IN_FLIGHT = 8  # maximum number of running prediction tasks
+LATEST_VERSION_TTL = 60  # seconds to cache latest version of models
 
 
 class Model:
@@ -15,6 +22,9 @@ class Model:
 
     """
 
+    __slots__ = ('owner', 'name', 'version', 'description', 'tags', 'repo_url',
+                 'is_public', 'extra_attributes')
+
     def __init__(self, owner, name, version, description, tags, repo_url, is_public, **extra_attributes):
         self.owner = owner
         self.name = name
@@ -23,7 +33,7 @@ class Model:
         self.tags = tags
         self.repo_url = repo_url
         self.is_public = is_public
-        self.extra_attributes = extra_attributes
+        self.extra_attributes = extra_attributes or NO_EXTRA_ATTRIBUTES
 
     @classmethod
     def _from_attributes(cls, **attrs):
@@ -38,19 +48,36 @@ class Model:
         return cls(**attrs)
 
     @classmethod
-    def all(cls, username: str):
-        """Fetches all available models."""
-        return [
-            cls._from_attributes(**attrs, version=attrs["latest_version"])
-            for attrs in fetch_from_list_request(_get_model_base_path(username=username))
-        ]
+    def all(cls, username: str, *, cache: bool = None):
+        """Fetches all available models.
+
+        :param username str: User name
+        :param cache bool: Use the model metadata cache (see :meth:`get`)
+        :rtype: list
+
+        """
+        model_cache = _get_model_cache(cache)
+        path = _get_model_base_path(username=username)
+        models = model_cache.get(_get_cache_key(path), ttl=LATEST_VERSION_TTL) if model_cache else None
+        if models is None:
+            models = fetch_from_list_request(path)
+            if model_cache:
+                model_cache.set(_get_cache_key(path), models)
+        return [cls._from_attributes(**attrs, version=attrs["latest_version"]) for attrs in models]
 
     @classmethod
-    def get(cls, username_modelname: str, *, version: str = None):
+    def get(cls, username_modelname: str, *, version: str = None, cache: bool = None):
         """Gets a model from user
 
+        If the model metadata cache is enabled, either with ``cache=True`` or
+        by setting the ``DYM_MODEL_CACHE`` environment variable to ``1``,
+        metadata is cached on disk, shared between processes.  Metadata of a
+        specific version is cached forever, while the latest version of a
+        model is cached for :data:`LATEST_VERSION_TTL` seconds.
+
         :param username_modelname str: User name and model name, separated by /
         :param version str: Specific version to fetch, if not specified will use latest version
+        :param cache bool: Use the model metadata cache
         :rtype: Model
 
         """
@@ -58,7 +85,19 @@ class Model:
         if len(parts) != 2:
             raise ValueError("you must specify '{username}/{modelname}'")
         username, modelname = parts
-        attrs = request('get', _get_model_base_path(username=username, modelname=modelname))
+        model_cache = _get_model_cache(cache)
+        path = _get_model_base_path(username=username, modelname=modelname)
+        attrs = None
+        if model_cache:
+            if version:
+                attrs = model_cache.get(_get_cache_key(path, version))
+            else:
+                attrs = model_cache.get(_get_cache_key(path), ttl=LATEST_VERSION_TTL)
+        if attrs is None:
+            attrs = request('get', path)
+            if model_cache:
+                model_cache.set(_get_cache_key(path), attrs)
+                model_cache.set(_get_cache_key(path, version or attrs["latest_version"]), attrs)
         version_name = version if version else attrs["latest_version"]
         return cls._from_attributes(**attrs, version=version_name)
 
@@ -74,6 +113,66 @@ class Model:
         attrs = request('post', f'{path}predict/', body=dict(parameters={'input_dir': input_dir, **kwargs}))
         return Task._from_attributes(**attrs)
 
+    def predict_many(self, inputs, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, interval: float = 5, **kwargs):
+        """Start prediction tasks for many inputs, without overloading the API.
+
+        At most ``max_in_flight`` tasks are kept running at the same time: new
+        tasks are only started as running ones finish.  When the API throttles
+        requests (429 or 503), submission is retried after the delay given by
+        the ``Retry-After`` header.
+
+        If starting or checking a task fails for another reason, the
+        exception is raised with a ``tasks`` attribute holding the tasks
+        already started, so they can be waited for or retried::
+
+            try:
+                tasks = model.predict_many(inputs)
+            except Exception as err:
+                tasks = getattr(err, 'tasks', [])
+
+        :param inputs list: input directories, one per task
+        :param max_in_flight int: maximum number of running tasks
+        :param interval float: seconds to wait between checks of running tasks
+        :raises: ValueError if ``max_in_flight`` is not positive
+        :returns: a list of :class:`Task`, in the same order as ``inputs``
+        :rtype: list
+
+        """
+        if max_in_flight < 1:
+            raise ValueError(f"max_in_flight must be positive, got {max_in_flight}")
+        tasks = []
+        running = []
+        try:
+            for input_dir in inputs:
+                while len(running) >= max_in_flight:
+                    running = [task for task in running if retry_on_throttle(task.is_running)]
+                    if len(running) >= max_in_flight:
+                        time.sleep(interval)
+                task = retry_on_throttle(self.predict, input_dir, **kwargs)
+                tasks.append(task)
+                running.append(task)
+        except Exception as err:
+            err.tasks = tasks
+            raise
+        return tasks
+
+    def run_pipeline(self, inputs, output_dir: str = ".", **kwargs):
+        """Uploads batches of local files, predicts on them and downloads
+        the results, overlapping upload, prediction and download of
+        different batches.
+
+        See :func:`dymaxionlabs.pipeline.run_pipeline` for all options.
+
+        :param inputs list: list of batches, each one a list of local file paths
+        :param output_dir str: local directory where artifacts will be stored
+        :returns: a list of downloaded artifact paths for each batch
+        :rtype: list
+
+        """
+        from .pipeline import run_pipeline
+
+        return run_pipeline(self, inputs, output_dir, **kwargs)
+
     def __repr__(self):
         return "<Model owner={owner!r} name={name!r} version={version!r}>".format(owner=self.owner, name=self.name, version=self.version)
 
@@ -85,3 +184,17 @@ def _get_model_base_path(*, username, modelname=None, version=None):
     if version:
         path = f'{path}/versions/{version}'
     return f"{path}/"
+
+
+def _get_model_cache(cache=None):
+    if cache is None:
+        cache = os.getenv("DYM_MODEL_CACHE", "0").lower() in ("1", "true", "yes")
+    if cache:
+        return DiskCache(os.path.join(get_cache_dir(), "models"))
+
+
+def _get_cache_key(path, version=None):
+    key = f"{urlparse(get_api_url()).netloc}{path}"
+    if version:
+        key = f"{key}versions/{version}/"
+    return key
@@ -0,0 +1,135 @@
+"""
+Bulk transfers using many processes.
+
+:meth:`File.upload_many` and :meth:`File.download_many` use threads, so
+CPU-bound parts of transfers (checksums, TLS) are limited to a single
+core.  The functions in this module split the work in batches, and run
+each batch with threads in a pool of processes::
+
+    from dymaxionlabs import parallel
+
+    report = parallel.upload_many([(path, f"tiles/{os.path.basename(path)}")
+                                   for path in glob("tiles/*.tif")],
+                                  processes=8)
+
+Each process uses its own HTTP session (see :func:`utils.get_session`).  To
+enforce rate limits across all processes, set ``DYM_RATE_LIMIT_FILE`` (see
+:mod:`dymaxionlabs.ratelimit`).
+
+"""
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .progress import get_progress
+
+BATCHES_PER_PROCESS = 4  # batches per process, to balance load
+DEFAULT_THREADS_PER_PROCESS = 4  # concurrent transfers in each process
+
+
+def upload_many(items,
+                processes=None,
+                threads_per_process=DEFAULT_THREADS_PER_PROCESS,
+                progress=None,
+                mp_context=None,
+                **kwargs):
+    """Uploads many files to storage using a pool of processes.
+
+    :param items: list of ``(input_path, storage_path)`` pairs
+    :param int processes: number of processes (default: number of CPUs)
+    :param int threads_per_process: concurrent uploads in each process
+    :param progress: progress reporter (see :mod:`dymaxionlabs.progress`).
+        It is updated as batches of files finish.
+    :param mp_context: multiprocessing context (default: platform default)
+    :param dict kwargs: extra arguments for :meth:`File.upload_many`
+    :returns: a dict mapping each input path to the uploaded :class:`File`,
+        or to the exception raised when uploading it
+    :rtype: dict
+
+    """
+    items = list(items)
+    sizes = {input_path: os.path.getsize(input_path) for input_path, _ in items
+             if os.path.isfile(input_path)}
+    return _run_batches(_upload_batch, items, lambda item: sizes.get(item[0], 0),
+                        processes, threads_per_process, get_progress(progress, 'upload'),
+                        mp_context, kwargs)
+
+
+def download_many(items,
+                  processes=None,
+                  threads_per_process=DEFAULT_THREADS_PER_PROCESS,
+                  progress=None,
+                  mp_context=None,
+                  **kwargs):
+    """Downloads many files from storage using a pool of processes.
+
+    :param items: list of ``(file, output_file)`` pairs, where ``file`` is
+        a :class:`File` and ``output_file`` its local destination path
+    :param int processes: number of processes (default: number of CPUs)
+    :param int threads_per_process: concurrent downloads in each process
+    :param progress: progress reporter (see :mod:`dymaxionlabs.progress`).
+        It is updated as batches of files finish.
+    :param mp_context: multiprocessing context (default: platform default)
+    :param dict kwargs: extra arguments for :meth:`File.download_many`
+    :returns: a dict mapping each file path in storage to its local path,
+        or to the exception raised when downloading it
+    :rtype: dict
+
+    """
+    from .files import _get_size
+
+    return _run_batches(_download_batch, list(items),
+                        lambda item: _get_size(item[0]) or 0, processes,
+                        threads_per_process, get_progress(progress, 'download'),
+                        mp_context, kwargs)
+
+
+def _run_batches(func, items, get_size, processes, threads_per_process, reporter,
+                 mp_context, kwargs):
+    processes = processes or os.cpu_count() or 1
+    batches = _split(items, processes * BATCHES_PER_PROCESS)
+    report = {}
+    with reporter, ProcessPoolExecutor(max_workers=processes,
+                                       mp_context=mp_context) as executor:
+        reporter.set_total(sum(get_size(item) for item in items))
+        futures = {
+            executor.submit(func, batch, threads_per_process, kwargs): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            report.update(future.result())
+            reporter.update(sum(get_size(item) for item in futures[future]))
+    return report
+
+
+def _split(items, n):
+    """Splits ``items`` in at most ``n`` batches of similar length"""
+    size = max(1, -(-len(items) // n))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _upload_batch(items, max_workers, kwargs):
+    from .files import File
+
+    report = File.upload_many(items, max_workers=max_workers, progress=False, **kwargs)
+    return _picklable(report)
+
+
+def _download_batch(items, max_workers, kwargs):
+    from .files import File
+
+    report = File.download_many(items, max_workers=max_workers, progress=False, **kwargs)
+    return _picklable(report)
+
+
+def _picklable(report):
+    """Replaces exceptions that cannot be sent back to the parent process"""
+    res = {}
+    for key, value in report.items():
+        if isinstance(value, Exception):
+            try:
+                pickle.loads(pickle.dumps(value))
+            except Exception:
+                value = RuntimeError(f"{type(value).__name__}: {value}")
+        res[key] = value
+    return res
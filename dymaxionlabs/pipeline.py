@@ -0,0 +1,180 @@
+import os
+import queue
+import threading
+import time
+import uuid
+
+from .files import File
+from .utils import DEFAULT_MAX_WORKERS, retry_on_throttle
+
+DEFAULT_QUEUE_SIZE = 2  # batches waiting between stages
+
+_DONE = object()
+
+
+def run_pipeline(model,
+                 inputs,
+                 output_dir=".",
+                 storage_dir="pipelines/",
+                 batch_size=None,
+                 upload_workers=DEFAULT_MAX_WORKERS,
+                 max_in_flight=2,
+                 download_workers=DEFAULT_MAX_WORKERS,
+                 queue_size=DEFAULT_QUEUE_SIZE,
+                 interval=5,
+                 timeout=60 * 60,
+                 run_id=None,
+                 keep_inputs=False,
+                 **kwargs):
+    """Uploads, predicts and downloads results of batches of local files,
+    overlapping the stages.
+
+    Each batch goes through these stages:
+
+    1. Upload its files to a ``batch_*/`` directory of this run in
+       ``storage_dir``, ``upload_workers`` at a time.
+    2. Start a prediction task on the uploaded directory and wait for it
+       to finish, with at most ``max_in_flight`` tasks running at once.
+       Then delete the uploaded files, unless ``keep_inputs`` is True.
+    3. Download its artifacts to ``output_dir``, ``download_workers`` at a
+       time.
+
+    Each run uploads its inputs under its own ``run_id`` directory, so
+    predictions never see files from previous or concurrent runs.  If the
+    pipeline fails, files of batches that were uploaded but not predicted
+    yet are kept in storage.
+
+    Stages run concurrently, so batch N+1 is uploading while batch N is
+    being predicted and artifacts from batch N-1 are being downloaded.  At
+    most ``queue_size`` batches wait between two stages.
+
+    :param Model model: model used for predicting
+    :param list inputs: list of batches, each one a list of local file
+        paths, or a flat list of local file paths if ``batch_size`` is set
+    :param str output_dir: local directory where artifacts will be stored
+    :param str storage_dir: storage directory where inputs will be uploaded
+    :param int batch_size: split ``inputs`` into batches of this size
+    :param int upload_workers: number of concurrent uploads
+    :param int max_in_flight: maximum number of running prediction tasks
+    :param int download_workers: number of concurrent downloads
+    :param int queue_size: maximum number of batches waiting between stages
+    :param float interval: seconds to wait between checks of running tasks
+    :param float timeout: maximum seconds to wait for each task
+    :param str run_id: name of the storage directory of this run, inside
+        ``storage_dir`` (default: a timestamp and a random suffix)
+    :param bool keep_inputs: do not delete uploaded files after predicting
+    :param dict kwargs: extra prediction parameters
+    :raises: RuntimeError if a prediction task did not finish successfully
+    :returns: a list of downloaded artifact paths for each batch
+    :rtype: list
+
+    """
+    if batch_size:
+        inputs = list(inputs)
+        inputs = [
+            inputs[i:i + batch_size] for i in range(0, len(inputs), batch_size)
+        ]
+    if storage_dir and not storage_dir.endswith("/"):
+        storage_dir = f"{storage_dir}/"
+    if run_id is None:
+        run_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    run_dir = f"{storage_dir}{run_id}/"
+
+    def delete_inputs(paths):
+        if not keep_inputs:
+            File.delete_many(paths, max_workers=upload_workers)
+
+    def upload(i, batch):
+        batch_dir = f"{run_dir}batch_{i:05d}/"
+        report = File.upload_many([(path, batch_dir) for path in batch],
+                                  max_workers=upload_workers,
+                                  progress=False)
+        paths = [f.path for f in report.values() if not isinstance(f, Exception)]
+        failed = [err for err in report.values() if isinstance(err, Exception)]
+        if failed:
+            delete_inputs(paths)
+            raise failed[0]
+        return i, batch_dir, paths
+
+    def predict(i, batch_dir, paths):
+        try:
+            task = retry_on_throttle(model.predict, batch_dir, **kwargs)
+            task.wait_until_finished(interval=interval, timeout=timeout)
+        finally:
+            delete_inputs(paths)
+        if task.state != 'FINISHED':
+            raise RuntimeError(
+                f"prediction task {task.id} for {batch_dir} ended with state "
+                f"{task.state}: {task.error}")
+        return i, task
+
+    def download(i, task):
+        batch_output_dir = os.path.join(output_dir, f"batch_{i:05d}")
+        return i, task.download_artifacts(batch_output_dir,
+                                          parallel=True,
+                                          max_workers=download_workers)
+
+    errors = []
+    uploads = queue.Queue(maxsize=queue_size)
+    tasks = queue.Queue(maxsize=queue_size)
+    downloads = queue.Queue(maxsize=queue_size)
+    results = queue.Queue()
+    stages = [
+        _start_stage(upload, uploads, tasks, 1, errors),
+        _start_stage(predict, tasks, downloads, max_in_flight, errors),
+        _start_stage(download, downloads, results, 1, errors),
+    ]
+    for i, batch in enumerate(inputs):
+        if errors:
+            break
+        uploads.put((i, batch))
+    uploads.put(_DONE)
+    for stage in stages:
+        stage.join()
+    if errors:
+        raise errors[0]
+
+    res = {}
+    while not results.empty():
+        item = results.get()
+        if item is not _DONE:
+            i, paths = item
+            res[i] = paths
+    return [res[i] for i in sorted(res)]
+
+
+def _start_stage(func, inbox, outbox, workers, errors):
+    """Starts a pipeline stage, calling ``func`` on each item of ``inbox``
+    from ``workers`` threads and putting its results on ``outbox``.
+
+    Returns a thread that finishes once all items have been processed.  If
+    any stage fails, remaining items are drained without being processed.
+
+    """
+    def work():
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                # Let sibling workers know there are no more items
+                inbox.put(_DONE)
+                return
+            if errors:
+                continue
+            try:
+                outbox.put(func(*item))
+            except Exception as err:
+                errors.append(err)
+
+    def run():
+        threads = [
+            threading.Thread(target=work, daemon=True) for _ in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        outbox.put(_DONE)
+
+    stage = threading.Thread(target=run, daemon=True)
+    stage.start()
+    return stage
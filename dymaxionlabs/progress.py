@@ -0,0 +1,311 @@
+"""
+Progress reporting for file transfers.
+
+Transfer methods (like :meth:`File.upload`, :meth:`File.download` or
+:meth:`Task.download_artifacts`) accept a ``progress`` argument, which can
+be:
+
+- ``None``, to use the default reporter: a ``tqdm`` progress bar if
+  standard error is a terminal, or no reporting otherwise.  It can be
+  changed with the ``DYM_PROGRESS`` environment variable.
+- A backend name: ``"tqdm"``, ``"logging"`` or ``"none"``.
+- ``False``, to disable progress reporting.
+- A callable ``factory(description, total)`` that returns a
+  :class:`Progress`, like any :class:`Progress` subclass, a
+  :class:`CallbackProgress` partial, or an :class:`AggregateProgress`
+  instance, that combines concurrent transfers into a single reporter.
+
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Smoothing factor for instantaneous throughput
+_RATE_SMOOTHING = 0.3
+# Minimum seconds between throughput samples
+_RATE_MIN_INTERVAL = 0.1
+
+
+class Progress:
+    """Tracks progress of a transfer: bytes transferred, instantaneous and
+    average throughput, and estimated time to completion.
+
+    Subclasses report progress by overriding :meth:`on_update` and
+    :meth:`on_close`.  This base class reports nothing.
+
+    :param str description: description of the transfer, usually a path
+    :param int total: total number of bytes to transfer, if known
+
+    """
+
+    def __init__(self, description=None, total=None):
+        self.description = description
+        self.total = total
+        self.transferred = 0
+        self.rate = None
+        self.started_at = time.monotonic()
+        self._sample_at = self.started_at
+        self._sample_bytes = 0
+        self.closed = False
+
+    @property
+    def elapsed(self):
+        """Seconds since the transfer started"""
+        return time.monotonic() - self.started_at
+
+    @property
+    def average_rate(self):
+        """Average throughput, in bytes per second"""
+        elapsed = self.elapsed
+        return self.transferred / elapsed if elapsed > 0 else None
+
+    @property
+    def eta(self):
+        """Estimated seconds to completion, if known"""
+        rate = self.rate or self.average_rate
+        if self.total is None or not rate:
+            return
+        return max(0, self.total - self.transferred) / rate
+
+    def set_total(self, total):
+        """Sets the total number of bytes to transfer.
+
+        :param int total: total bytes
+
+        """
+        self.total = total
+        self.on_update(0)
+
+    def update(self, nbytes):
+        """Records that ``nbytes`` more bytes were transferred.
+
+        :param int nbytes: bytes transferred since last update
+
+        """
+        self.transferred += nbytes
+        now = time.monotonic()
+        dt = now - self._sample_at
+        if dt >= _RATE_MIN_INTERVAL:
+            rate = (self.transferred - self._sample_bytes) / dt
+            if self.rate is None:
+                self.rate = rate
+            else:
+                self.rate = _RATE_SMOOTHING * rate + (1 - _RATE_SMOOTHING) * self.rate
+            self._sample_at = now
+            self._sample_bytes = self.transferred
+        self.on_update(nbytes)
+
+    def close(self):
+        """Finishes reporting progress"""
+        if not self.closed:
+            self.closed = True
+            self.on_close()
+
+    def on_update(self, nbytes):
+        pass
+
+    def on_close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        return (f"<{type(self).__module__}.{type(self).__name__} "
+                f"description={self.description!r} "
+                f"transferred={self.transferred} total={self.total}>")
+
+
+class NullProgress(Progress):
+    """Does not report progress"""
+
+
+class TqdmProgress(Progress):
+    """Reports progress with a ``tqdm`` progress bar"""
+
+    def __init__(self, description=None, total=None, **tqdm_kwargs):
+        super().__init__(description, total)
+        from tqdm import tqdm
+
+        self._bar = tqdm(desc=description,
+                         total=total,
+                         unit_scale=True,
+                         unit='B',
+                         unit_divisor=1024,
+                         **tqdm_kwargs)
+
+    def set_total(self, total):
+        self._bar.total = total
+        super().set_total(total)
+
+    def on_update(self, nbytes):
+        if nbytes:
+            self._bar.update(nbytes)
+
+    def on_close(self):
+        self._bar.close()
+
+
+class LoggingProgress(Progress):
+    """Reports progress by logging a message every ``interval`` seconds,
+    and when the transfer finishes.
+
+    :param float interval: minimum seconds between messages
+    :param logging.Logger logger: logger to use
+
+    """
+
+    def __init__(self, description=None, total=None, interval=10, logger=logger):
+        super().__init__(description, total)
+        self.interval = interval
+        self.logger = logger
+        self._logged_at = self.started_at
+
+    def format(self):
+        parts = [_format_bytes(self.transferred)]
+        if self.total:
+            parts[0] = (f"{parts[0]} / {_format_bytes(self.total)} "
+                        f"({self.transferred / self.total:.0%})")
+        if self.rate is not None:
+            parts.append(f"{_format_bytes(self.rate)}/s")
+        if self.average_rate is not None:
+            parts.append(f"avg {_format_bytes(self.average_rate)}/s")
+        if self.eta is not None and not self.closed:
+            parts.append(f"ETA {self.eta:.0f}s")
+        return f"{self.description or 'transfer'}: {', '.join(parts)}"
+
+    def on_update(self, nbytes):
+        now = time.monotonic()
+        if now - self._logged_at >= self.interval:
+            self._logged_at = now
+            self.logger.info(self.format())
+
+    def on_close(self):
+        self.logger.info(self.format())
+
+
+class CallbackProgress(Progress):
+    """Reports progress by calling ``callback`` with this :class:`Progress`
+    on every update.  Use it with :func:`functools.partial`::
+
+        File.download(progress=functools.partial(CallbackProgress, callback=print))
+
+    :param callable callback: function called with the progress instance
+
+    """
+
+    def __init__(self, description=None, total=None, callback=None):
+        super().__init__(description, total)
+        self.callback = callback
+
+    def on_update(self, nbytes):
+        self.callback(self)
+
+    def on_close(self):
+        self.callback(self)
+
+
+class AggregateProgress:
+    """Combines progress of many concurrent transfers into ``reporter``.
+
+    Pass it as the ``progress`` argument of transfer methods: each transfer
+    adds its bytes (and total, if known) to the reporter.  Updates are
+    thread-safe.
+
+    :param Progress reporter: progress reporter of all transfers
+
+    """
+
+    def __init__(self, reporter):
+        self.reporter = reporter
+        self._lock = threading.Lock()
+        if self.reporter.total is None:
+            self.reporter.total = 0
+
+    def __call__(self, description=None, total=None):
+        return _ChildProgress(self, description, total)
+
+    def _add_total(self, total):
+        with self._lock:
+            self.reporter.set_total(self.reporter.total + total)
+
+    def _update(self, nbytes):
+        with self._lock:
+            self.reporter.update(nbytes)
+
+    def close(self):
+        self.reporter.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class _ChildProgress(Progress):
+    def __init__(self, parent, description=None, total=None):
+        super().__init__(description, total)
+        self.parent = parent
+        if total:
+            parent._add_total(total)
+
+    def set_total(self, total):
+        self.parent._add_total((total or 0) - (self.total or 0))
+        super().set_total(total)
+
+    def on_update(self, nbytes):
+        if nbytes:
+            self.parent._update(nbytes)
+
+
+BACKENDS = {
+    'tqdm': TqdmProgress,
+    'logging': LoggingProgress,
+    'none': NullProgress,
+}
+
+
+def get_progress(progress, description=None, total=None):
+    """Creates a :class:`Progress` from the ``progress`` argument of a
+    transfer method (see module documentation).
+
+    :param progress: progress reporter factory, backend name, None or False
+    :param str description: description of the transfer
+    :param int total: total number of bytes to transfer, if known
+    :rtype: Progress
+
+    """
+    if progress is None:
+        progress = os.getenv('DYM_PROGRESS')
+        if not progress:
+            progress = 'tqdm' if _isatty(sys.stderr) else 'none'
+    if progress is False:
+        progress = 'none'
+    if isinstance(progress, str):
+        if progress not in BACKENDS:
+            raise ValueError(f"invalid progress backend: {progress!r}")
+        progress = BACKENDS[progress]
+    return progress(description, total)
+
+
+def _isatty(stream):
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def _format_bytes(nbytes):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(nbytes) < 1024:
+            return f"{nbytes:.1f} {unit}"
+        nbytes /= 1024
+    return f"{nbytes:.1f} TB"
@@ -0,0 +1,185 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+METADATA = 'metadata'
+UPLOAD = 'upload'
+DOWNLOAD = 'download'
+ENDPOINT_CLASSES = (METADATA, UPLOAD, DOWNLOAD)
+
+
+class RateLimiter:
+    """A token-bucket rate limiter, shared by all threads using it.
+
+    Each endpoint class (``metadata``, ``upload`` and ``download``) has its
+    own budget of requests per second.  Besides, when the API asks clients
+    to slow down (with a ``Retry-After`` header), :meth:`cool_down` makes
+    *all* requests wait, instead of each thread retrying on its own.
+
+    If ``path`` is set, the limiter state is stored in that file and shared
+    with all processes on the same host using the same path.
+
+    :param dict rates: maximum requests per second for each endpoint class.
+        Classes not set (or set to None) are not limited.
+    :param float burst: maximum number of requests allowed in a burst
+        (default: one second worth of requests)
+    :param str path: file used to share state between processes
+
+    """
+
+    def __init__(self, rates=None, burst=None, path=None):
+        self.rates = dict(rates or {})
+        self.burst = burst
+        self.path = path
+        if path and fcntl is None:
+            raise RuntimeError(
+                "sharing rate limits between processes is not supported on this platform")
+        self._lock = threading.Lock()
+        self._local_state = self._empty_state()
+
+    @staticmethod
+    def _empty_state():
+        return dict(cooldown_until=0, buckets={})
+
+    @contextmanager
+    def _state(self):
+        with self._lock:
+            if not self.path:
+                yield self._local_state
+                return
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                with os.fdopen(os.dup(fd), 'r+') as f:
+                    try:
+                        state = json.load(f)
+                    except ValueError:
+                        state = self._empty_state()
+                    yield state
+                    f.seek(0)
+                    f.truncate()
+                    json.dump(state, f)
+            finally:
+                os.close(fd)
+
+    def _try_acquire(self, endpoint_class):
+        """Takes a token for ``endpoint_class`` if possible, otherwise returns
+        the number of seconds to wait before trying again"""
+        with self._state() as state:
+            now = time.time()
+            wait = state['cooldown_until'] - now
+            if wait > 0:
+                return wait
+            rate = self.rates.get(endpoint_class)
+            if not rate:
+                return 0
+            burst = self.burst or max(rate, 1)
+            tokens, updated = state['buckets'].get(endpoint_class, (burst, now))
+            tokens = min(burst, tokens + max(0, now - updated) * rate)
+            if tokens >= 1:
+                state['buckets'][endpoint_class] = (tokens - 1, now)
+                return 0
+            state['buckets'][endpoint_class] = (tokens, now)
+            return (1 - tokens) / rate
+
+    def acquire(self, endpoint_class=METADATA):
+        """Blocks until a request to ``endpoint_class`` is allowed.
+
+        :param str endpoint_class: ``metadata``, ``upload`` or ``download``
+
+        """
+        while True:
+            wait = self._try_acquire(endpoint_class)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def wait(self):
+        """Blocks until the current cool-down period, if any, is over"""
+        while True:
+            with self._state() as state:
+                wait = state['cooldown_until'] - time.time()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def cool_down(self, seconds):
+        """Stops all requests for ``seconds``.
+
+        :param float seconds: seconds to wait, usually from ``Retry-After``
+
+        """
+        with self._state() as state:
+            state['cooldown_until'] = max(state['cooldown_until'],
+                                          time.time() + seconds)
+
+    def _after_fork(self):
+        # The lock may have been held by another thread when forking.
+        # Without a shared file, the child process starts with a full budget.
+        self._lock = threading.Lock()
+        self._local_state = self._empty_state()
+
+    def __repr__(self):
+        return f"<dymaxionlabs.ratelimit.RateLimiter rates={self.rates!r}>"
+
+
+_rate_limiter = None
+
+
+def get_rate_limiter():
+    """Gets the rate limiter used by all requests to the API.
+
+    By default, it is configured from the environment:
+    ``DYM_RATE_LIMIT_METADATA``, ``DYM_RATE_LIMIT_UPLOAD`` and
+    ``DYM_RATE_LIMIT_DOWNLOAD`` set requests per second for each endpoint
+    class, and ``DYM_RATE_LIMIT_FILE`` shares limits between processes.
+
+    :rtype: RateLimiter
+
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        rates = {}
+        for endpoint_class in ENDPOINT_CLASSES:
+            value = os.getenv(f"DYM_RATE_LIMIT_{endpoint_class.upper()}")
+            if value:
+                rates[endpoint_class] = float(value)
+        _rate_limiter = RateLimiter(rates,
+                                    path=os.getenv("DYM_RATE_LIMIT_FILE"))
+    return _rate_limiter
+
+
+def set_rate_limiter(rate_limiter):
+    """Sets the rate limiter used by all requests to the API.
+
+    :param RateLimiter rate_limiter: new rate limiter
+
+    """
+    global _rate_limiter
+    _rate_limiter = rate_limiter
+
+
+def _reset_rate_limiter_after_fork():
+    if _rate_limiter is not None:
+        _rate_limiter._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_rate_limiter_after_fork)
+
+
+def get_endpoint_class(path):
+    """Returns the endpoint class of an API ``path``"""
+    path = path.split('?')[0]
+    if path.endswith('/upload/'):
+        return UPLOAD
+    if path.endswith('/download/') or path.endswith('/download-artifacts/'):
+        return DOWNLOAD
+    return METADATA
@@ -0,0 +1,253 @@
+"""
+Random access to files in storage.
+
+:class:`RemoteFile` is a read-only, seekable file object that fetches only
+the byte ranges being read, using HTTP Range requests.  This lets libraries
+that read files partially, like raster libraries reading a window of a
+Cloud-Optimized GeoTIFF, fetch only the header and the tiles they need::
+
+    import rasterio
+
+    with File.get("images/ortho.tif").open() as f, rasterio.open(f) as src:
+        window = src.read(1, window=((0, 256), (0, 256)))
+
+Data is fetched in blocks, which are kept in an LRU cache.  Missing
+adjacent blocks are fetched with a single request, and sequential reads
+fetch a few blocks ahead.  If the server does not support Range requests,
+the whole file is downloaded once and kept in memory.
+
+"""
+import io
+import re
+import threading
+from collections import OrderedDict
+
+import requests
+
+from .utils import request
+
+DEFAULT_BLOCK_SIZE = 2**18  # 256 KB
+DEFAULT_CACHE_BLOCKS = 64  # 16 MB with default block size
+DEFAULT_READ_AHEAD = 4  # blocks fetched ahead on sequential reads
+RANGE_RETRIES = 2
+
+_CONTENT_RANGE_RE = re.compile(r'bytes (\d+)-(\d+)/(\d+|\*)')
+
+
+class RemoteFile(io.RawIOBase):
+    """A read-only, seekable file object for a file in storage.
+
+    Usually created with :meth:`File.open`.
+
+    :param str path: path of the file in storage
+    :param int size: size of the file in bytes, if known.  Otherwise, it is
+        taken from the first response.
+    :param int block_size: size of blocks fetched and cached, in bytes
+    :param int cache_blocks: maximum number of blocks to keep in cache
+    :param int read_ahead: number of extra blocks fetched on sequential reads
+
+    """
+
+    base_path = '/storage'
+
+    def __init__(self,
+                 path,
+                 size=None,
+                 block_size=DEFAULT_BLOCK_SIZE,
+                 cache_blocks=DEFAULT_CACHE_BLOCKS,
+                 read_ahead=DEFAULT_READ_AHEAD):
+        if block_size < 1 or cache_blocks < 1:
+            raise ValueError("block_size and cache_blocks must be positive")
+        self.path = path
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.read_ahead = read_ahead
+        self._size = size
+        self._pos = 0
+        self._last_end = 0
+        self._blocks = OrderedDict()
+        self._data = None  # whole file, if the server does not support Range
+        self._lock = threading.Lock()
+        self.requests = 0
+
+    @property
+    def size(self):
+        """Size of the file in bytes"""
+        if self._size is None:
+            with self._lock:
+                self._fetch_blocks(0, 1)
+        return self._size
+
+    def __len__(self):
+        return self.size
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        self._check_closed()
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._check_closed()
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self._pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError(f"invalid whence ({whence})")
+        if pos < 0:
+            raise ValueError(f"negative seek position {pos}")
+        self._pos = pos
+        return pos
+
+    def read(self, size=-1):
+        self._check_closed()
+        start = self._pos
+        if size is None or size < 0:
+            end = self.size
+        elif self._size is None and start == 0:
+            # Size will be known after the first request
+            end = size
+        else:
+            end = min(start + size, self.size)
+        if start >= end:
+            return b''
+        data = self._read_range(start, end)
+        self._pos = start + len(data)
+        return data
+
+    def readall(self):
+        return self.read()
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self._blocks.clear()
+        self._data = None
+        super().close()
+
+    def _check_closed(self):
+        if self.closed:
+            raise ValueError("I/O operation on closed file")
+
+    def _read_range(self, start, end):
+        """Returns bytes from ``start`` to ``end``, fetching missing blocks"""
+        first = start // self.block_size
+        last = (end - 1) // self.block_size
+        with self._lock:
+            if self._data is not None:
+                self._last_end = min(end, self._size)
+                return self._data[start:end]
+            # Keep references to cached blocks, as fetching the missing ones
+            # may evict them
+            blocks = {}
+            for i in range(first, last + 1):
+                if i in self._blocks:
+                    self._blocks.move_to_end(i)
+                    blocks[i] = self._blocks[i]
+            missing = [i for i in range(first, last + 1) if i not in blocks]
+            if missing:
+                # Read ahead only on sequential access
+                if start == self._last_end and self.read_ahead and self._size:
+                    last_block = (self._size - 1) // self.block_size
+                    extra = range(last + 1, min(last + self.read_ahead, last_block) + 1)
+                    missing.extend(i for i in extra if i not in self._blocks)
+                for run_start, run_end in _coalesce(missing):
+                    blocks.update(self._fetch_blocks(run_start, run_end))
+                    if self._data is not None:
+                        self._last_end = min(end, self._size)
+                        return self._data[start:end]
+                end = min(end, self._size)
+                last = (end - 1) // self.block_size
+            self._last_end = end
+        data = b''.join(blocks[i] for i in range(first, last + 1))
+        offset = start - first * self.block_size
+        return data[offset:offset + end - start]
+
+    def _fetch_blocks(self, first, last):
+        """Fetches blocks from ``first`` to ``last`` (exclusive) with a single
+        Range request, and stores in cache the last ones that fit.  Returns
+        a dict with all fetched blocks, by index."""
+        start = first * self.block_size
+        end = last * self.block_size
+        if self._size is not None:
+            end = min(end, self._size)
+        data = self._get_range(start, end)
+        blocks = {}
+        if self._data is not None:
+            return blocks
+        for i in range(first, last):
+            offset = (i - first) * self.block_size
+            block = data[offset:offset + self.block_size]
+            if not block:
+                break
+            blocks[i] = block
+        for i in list(blocks)[-self.cache_blocks:]:
+            self._blocks[i] = blocks[i]
+            self._blocks.move_to_end(i)
+        while len(self._blocks) > self.cache_blocks:
+            self._blocks.popitem(last=False)
+        return blocks
+
+    def _get_range(self, start, end):
+        """Fetches bytes from ``start`` to ``end``, retrying on connection
+        errors and truncated responses"""
+        for attempt in range(RANGE_RETRIES + 1):
+            try:
+                data = self._request_range(start, end)
+                if self._size is None or len(data) == min(end, self._size) - start:
+                    return data
+                err = IOError(f"truncated response for {self.path}: "
+                              f"expected {end - start} bytes, got {len(data)}")
+            except (requests.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError) as exc:
+                err = exc
+            if attempt == RANGE_RETRIES:
+                raise err
+
+    def _request_range(self, start, end):
+        response = request('get',
+                           f'{self.base_path}/download/',
+                           params=dict(path=self.path),
+                           headers={'Range': f'bytes={start}-{end - 1}'},
+                           binary=True,
+                           stream=True)
+        self.requests += 1
+        data = response.content
+        if response.status_code == 206:
+            match = _CONTENT_RANGE_RE.match(response.headers.get('Content-Range', ''))
+            if match and match.group(3) != '*':
+                self._size = int(match.group(3))
+            if match and int(match.group(1)) != start:
+                raise IOError(f"unexpected range in response: {match.group(0)}")
+            return data
+        # Range not supported: server sent the whole file.  Keep it, so
+        # that further reads do not download it again.
+        self._size = len(data)
+        self._data = data
+        self._blocks.clear()
+        return data[start:end]
+
+    def __repr__(self):
+        return f"<dymaxionlabs.remote.RemoteFile path=\"{self.path}\">"
+
+
+def _coalesce(indexes):
+    """Groups sorted block ``indexes`` into ``(start, end)`` runs of
+    adjacent blocks"""
+    runs = []
+    for i in sorted(indexes):
+        if runs and runs[-1][1] == i:
+            runs[-1][1] = i + 1
+        else:
+            runs.append([i, i + 1])
+    return runs
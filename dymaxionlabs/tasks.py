@@ -1,7 +1,16 @@
+import fnmatch
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 
-from .utils import fetch_from_list_request, request
+from .files import File, _write_response
+from .progress import AggregateProgress, get_progress
+from .utils import (DEFAULT_MAX_WORKERS, NO_EXTRA_ATTRIBUTES, EntityList,
+                    fetch_from_list_request, request)
+
+TASK_FIELDS = ('id', 'state', 'name', 'args', 'kwargs', 'created_at',
+               'updated_at', 'finished_at', 'metadata', 'duration',
+               'estimated_duration', 'error')
 
 
 class Task:
@@ -28,6 +37,8 @@ class Task:
 
     """
 
+    __slots__ = TASK_FIELDS + ('extra_attributes', )
+
     base_path = "/tasks"
 
     def __init__(self, *, id, state, name, args, kwargs, created_at,
@@ -45,19 +56,23 @@ class Task:
         self.duration = duration
         self.estimated_duration = estimated_duration
         self.error = error
+        self.extra_attributes = extra_attributes or NO_EXTRA_ATTRIBUTES
 
     @classmethod
-    def all(cls, path="*"):
+    def all(cls, path="*", columnar=False):
         """Fetches all tasks.
 
+        For large listings, use ``columnar=True`` to get a compact
+        :class:`TaskList` instead, which builds :class:`Task` instances only
+        on access and can be exported to pandas or Arrow.
+
+        :param bool columnar: return a :class:`TaskList` instead of a list
         :returns: a list of :class:`Task`
-        :rtype: list
+        :rtype: list or TaskList
 
         """
-        return [
-            cls._from_attributes(**attrs)
-            for attrs in fetch_from_list_request(f'{cls.base_path}/')
-        ]
+        tasks = TaskList(fetch_from_list_request(f'{cls.base_path}/'))
+        return tasks if columnar else list(tasks)
 
     @classmethod
     def get(cls, id):
@@ -100,8 +115,7 @@ class Task:
 
     def wait_until_finished(self, interval: float = 5, timeout: float = 60 * 60):
         timeout_start = time.time()
-        is_valid = time.time() < timeout_start + timeout
-        while self.is_running() and is_valid:
+        while self.is_running() and time.time() < timeout_start + timeout:
             time.sleep(interval)
 
     def has_artifacts(self):
@@ -125,26 +139,72 @@ class Task:
                            f'{self.base_path}/{self.id}/list-artifacts/')
         return response['files']
 
-    def download_artifacts(self, output_dir="."):
-        """Downloads output artifacts in a compressed Zip file,
-        and stores it on ``output_dir``.
+    def download_artifacts(self,
+                           output_dir=".",
+                           parallel=False,
+                           max_workers=DEFAULT_MAX_WORKERS,
+                           pattern=None,
+                           progress=None):
+        """Downloads output artifacts and stores them on ``output_dir``.
+
+        By default, artifacts are downloaded in a single compressed Zip file.
+        If ``parallel`` is True or a ``pattern`` is given, each artifact
+        listed by :meth:`list_artifacts` is fetched individually instead
+        (concurrently, when ``parallel`` is True), keeping their relative
+        paths.  Files already present locally with the same size are skipped.
 
         If ``output_dir`` does not exist, it will be created.
 
-        :param str output_dir: directory path where file will be stored
-        :returns: path to the artifacts zip file
-        :rtype: str
+        :param str output_dir: directory path where files will be stored
+        :param bool parallel: fetch artifacts one by one, concurrently
+        :param int max_workers: number of concurrent downloads
+        :param str pattern: only fetch artifacts matching this glob pattern
+        :param progress: progress reporter (see :mod:`dymaxionlabs.progress`).
+            Progress of concurrent downloads is reported together.
+        :returns: path to the artifacts zip file, or a list of paths to
+            each artifact file if fetched individually
+        :rtype: str or list
 
         """
         os.makedirs(output_dir, exist_ok=True)
-        content = request('get',
-                          f'{self.base_path}/{self.id}/download-artifacts/',
-                          binary=True,
-                          parse_response=False)
+        if parallel or pattern:
+            return self._download_artifact_files(
+                output_dir,
+                max_workers=max_workers if parallel else 1,
+                pattern=pattern,
+                progress=progress)
+        response = request('get',
+                           f'{self.base_path}/{self.id}/download-artifacts/',
+                           binary=True,
+                           stream=True)
         output_file = os.path.join(output_dir, f'artifacts_{self.id}.zip')
-        with open(output_file, 'wb') as f:
-            f.write(content)
-        return output_file
+        return _write_response(
+            response, output_file,
+            get_progress(progress, f'artifacts_{self.id}.zip'))
+
+    def _download_artifact_files(self, output_dir, max_workers, pattern=None,
+                                 progress=None):
+        paths = self.list_artifacts()
+        if pattern:
+            paths = [p for p in paths if fnmatch.fnmatch(p, pattern)]
+        if not paths:
+            return []
+        base_dir = os.path.commonpath([os.path.dirname(p) for p in paths])
+
+        def fetch(path):
+            output_file = os.path.join(output_dir,
+                                       os.path.relpath(path, base_dir))
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            if os.path.exists(output_file):
+                size = _get_remote_size(path)
+                if size is not None and size == os.path.getsize(output_file):
+                    return output_file
+            return File._download(path, output_file, progress=aggregate)
+
+        reporter = get_progress(progress, f'Task {self.id} artifacts')
+        with AggregateProgress(reporter) as aggregate, \
+                ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(fetch, paths))
 
     def export_artifacts(self, storage_dir):
         """Stores output artifacts in ``storage_dir``.
@@ -166,9 +226,20 @@ class Task:
 
         """
         attrs = request('get', f'{self.base_path}/{self.id}/')
-        self.__dict__.update(self._from_attributes(**attrs).__dict__)
+        self._update_attributes(**attrs)
         return self
 
+    def _update_attributes(self, **attrs):
+        """Updates task attributes in place from an ``attrs`` dictionary.
+
+        :param dict attrs: Task attributes
+
+        """
+        for field in TASK_FIELDS:
+            if field in attrs:
+                setattr(self, field, attrs.pop(field))
+        self.extra_attributes = attrs or NO_EXTRA_ATTRIBUTES
+
     def cancel(self):
         """Cancel the task if it is possible.
 
@@ -182,3 +253,21 @@ class Task:
         return (f"<dymaxionlabs.tasks.Task id={self.id} "
                 f"name=\"{self.name}\" "
                 f"state=\"{self.state}\">")
+
+
+class TaskList(EntityList):
+    """A compact list of :class:`Task`, stored by columns.
+
+    See :class:`dymaxionlabs.utils.EntityList`.
+
+    """
+
+    entity_class = Task
+    fields = TASK_FIELDS
+
+
+def _get_remote_size(path):
+    """Returns the size in bytes of file ``path`` in storage, if known"""
+    file = File.get(path, raise_error=False)
+    if file and isinstance(file.metadata, dict) and 'size' in file.metadata:
+        return int(file.metadata['size'])
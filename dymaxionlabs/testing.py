@@ -0,0 +1,601 @@
+"""
+A local, in-memory stand-in for the Dymaxion Labs API, for testing and
+benchmarking the client offline.
+
+It implements the storage endpoints (including the resumable upload
+protocol), tasks with state progression and paginated lists, and can
+inject faults: latency, bandwidth caps, error responses (like 429 or 503,
+with ``Retry-After``), dropped connections and corrupted responses.
+
+Use it from Python::
+
+    with FakeAPIServer(faults=Faults(latency=0.05, error_rate=0.1)) as server:
+        os.environ["DYM_API_URL"] = server.url
+        ...
+
+or, in a pytest suite, enable the ``fake_api`` fixture in ``conftest.py``::
+
+    pytest_plugins = ["dymaxionlabs.testing"]
+
+    def test_upload(fake_api, tmp_path):
+        ...
+        File.upload(path, "foo/")
+        assert "foo/data.bin" in fake_api.state.files
+
+or run it standalone with::
+
+    python -m dymaxionlabs.testing --port 8000 --error-rate 0.1
+
+and point the client to it with ``DYM_API_URL=http://127.0.0.1:8000/``.
+
+"""
+import argparse
+import base64
+import email.parser
+import email.policy
+import fnmatch
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import socket
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+try:
+    import pytest
+except ImportError:  # pragma: no cover
+    pytest = None
+
+API_PREFIX = '/v1'
+DEFAULT_PAGE_SIZE = 100
+
+_CONTENT_RANGE_RE = re.compile(r'bytes (?:(\d+)-(\d+)|\*)/(\d+|\*)')
+_RANGE_RE = re.compile(r'bytes=(\d+)-(\d*)$')
+_IO_CHUNK_SIZE = 2**16
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _md5(content):
+    return base64.b64encode(hashlib.md5(content).digest()).decode('ascii')
+
+
+class Faults:
+    """Faults injected by :class:`FakeAPIServer` on each request.
+
+    Random faults are drawn on every request to one of ``routes`` (all
+    routes by default).  Route names are the handler method names of
+    :class:`FakeAPIHandler`, like ``upload_chunk``, ``get_task`` or
+    ``download_file``.  Faults can also be scheduled for the next requests
+    with :meth:`fail_next`, :meth:`drop_next` and :meth:`corrupt_next`.
+
+    :param float latency: seconds to wait before handling each request
+    :param float bandwidth: maximum bytes per second, for both request and
+        response bodies of each connection
+    :param float error_rate: probability of responding with ``error_status``
+    :param int error_status: status code of injected errors
+    :param float retry_after: value of ``Retry-After`` header of injected
+        errors, if set
+    :param float drop_rate: probability of dropping the connection midway
+        through the response
+    :param list routes: only inject random faults on these routes
+    :param int seed: random seed, for reproducible faults
+
+    """
+    def __init__(self,
+                 latency=0,
+                 bandwidth=None,
+                 error_rate=0,
+                 error_status=503,
+                 retry_after=None,
+                 drop_rate=0,
+                 routes=None,
+                 seed=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.drop_rate = drop_rate
+        self.routes = routes
+        self._random = random.Random(seed)
+        self._scheduled = deque()
+        self._lock = threading.Lock()
+
+    def fail_next(self, route=None, status=503, times=1, retry_after=None):
+        """Responds with ``status`` to the next ``times`` requests to
+        ``route`` (or any route)."""
+        with self._lock:
+            for _ in range(times):
+                self._scheduled.append((route, ('error', status, retry_after)))
+
+    def corrupt_next(self, route=None, times=1):
+        """Flips a byte of the response body (or of the uploaded chunk, on
+        ``upload_chunk``) on the next ``times`` requests to ``route`` (or any
+        route)."""
+        with self._lock:
+            for _ in range(times):
+                self._scheduled.append((route, ('corrupt', )))
+
+    def drop_next(self, route=None, times=1):
+        """Drops the connection on the next ``times`` requests to ``route``
+        (or any route)."""
+        with self._lock:
+            for _ in range(times):
+                self._scheduled.append((route, ('drop', )))
+
+    def next_fault(self, route):
+        """Returns the fault to inject on a request to ``route``, if any"""
+        with self._lock:
+            for item in self._scheduled:
+                if item[0] is None or item[0] == route:
+                    self._scheduled.remove(item)
+                    return item[1]
+            if self.routes is not None and route not in self.routes:
+                return
+            if self._random.random() < self.error_rate:
+                return ('error', self.error_status, self.retry_after)
+            if self._random.random() < self.drop_rate:
+                return ('drop', )
+
+
+class FakeAPIState:
+    """In-memory state of the fake API: stored files, resumable upload
+    sessions, tasks and models."""
+    def __init__(self, task_polls=2, page_size=DEFAULT_PAGE_SIZE, faults=None):
+        self.lock = threading.Lock()
+        self.faults = faults or Faults()
+        self.files = {}
+        self.sessions = {}
+        self.tasks = {}
+        self.models = {}
+        self.task_polls = task_polls
+        self.page_size = page_size
+        self.requests = Counter()
+        self._ids = itertools.count(1)
+
+    def add_file(self, path, content):
+        with self.lock:
+            self.files[path] = content
+        return self.file_attributes(path)
+
+    def file_attributes(self, path):
+        content = self.files[path]
+        return dict(name=os.path.basename(path),
+                    path=path,
+                    metadata=dict(size=len(content), md5Hash=_md5(content)))
+
+    def add_task(self, name='predict', state='PENDING', artifacts=None,
+                 **kwargs):
+        with self.lock:
+            id = next(self._ids)
+            self.tasks[id] = dict(id=id,
+                                  name=name,
+                                  state=state,
+                                  args=[],
+                                  kwargs=kwargs,
+                                  created_at=_now(),
+                                  updated_at=_now(),
+                                  finished_at=None,
+                                  metadata=None,
+                                  duration=None,
+                                  estimated_duration=None,
+                                  error=None,
+                                  polls=0,
+                                  artifacts=artifacts or [])
+        return self.task_attributes(id)
+
+    def task_attributes(self, id):
+        task = self.tasks[id]
+        return {
+            k: v
+            for k, v in task.items() if k not in ('polls', 'artifacts')
+        }
+
+    def poll_task(self, id):
+        """Advances the state of task ``id`` each time it is fetched:
+        it finishes after ``task_polls`` polls."""
+        with self.lock:
+            task = self.tasks[id]
+            if task['state'] in ('PENDING', 'STARTED'):
+                task['polls'] += 1
+                task['state'] = 'STARTED'
+                if task['polls'] >= self.task_polls:
+                    task['state'] = 'FINISHED'
+                    task['finished_at'] = _now()
+                task['updated_at'] = _now()
+        return self.task_attributes(id)
+
+    def add_model(self, owner, name, latest_version='1.0'):
+        self.models[(owner, name)] = dict(owner=owner,
+                                          name=name,
+                                          description='',
+                                          tags=[],
+                                          repo_url=None,
+                                          is_public=True,
+                                          latest_version=latest_version)
+
+
+class FakeAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    routes = [
+        ('GET', r'/storage/files/$', 'list_files'),
+        ('GET', r'/storage/file/$', 'get_file'),
+        ('DELETE', r'/storage/file/$', 'delete_file'),
+        ('POST', r'/storage/upload/$', 'upload_file'),
+        ('POST', r'/storage/create-resumable-upload/$', 'create_resumable_upload'),
+        ('POST', r'/storage/check-completed-file/$', 'check_completed_file'),
+        ('GET', r'/storage/download/$', 'download_file'),
+        ('GET', r'/tasks/$', 'list_tasks'),
+        ('GET', r'/tasks/(\d+)/$', 'get_task'),
+        ('POST', r'/tasks/(\d+)/cancel/$', 'cancel_task'),
+        ('GET', r'/tasks/(\d+)/list-artifacts/$', 'list_artifacts'),
+        ('GET', r'/users/([^/]+)/models/$', 'list_models'),
+        ('GET', r'/users/([^/]+)/models/([^/]+)/$', 'get_model'),
+        ('POST', r'/users/([^/]+)/models/([^/]+)/versions/([^/]+)/predict/$',
+         'predict'),
+    ]
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except OSError:
+            # Connection was dropped, either injected or by the client
+            pass
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _dispatch(self, method):
+        url = urlparse(self.path)
+        self.query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        self.body = self._read_body()
+        self.fault = None
+        route, args = self._match_route(method, url.path)
+        if route is None:
+            return self.send_json({'detail': 'Not found.'}, status=404)
+        self.state.requests[route] += 1
+        faults = self.state.faults
+        if faults.latency:
+            time.sleep(faults.latency)
+        self.fault = faults.next_fault(route)
+        if self.fault and self.fault[0] == 'error':
+            _, status, retry_after = self.fault
+            headers = {}
+            if retry_after is not None:
+                headers['Retry-After'] = str(retry_after)
+            return self.send_json({'detail': 'Injected error.'},
+                                  status=status,
+                                  headers=headers)
+        getattr(self, route)(*args)
+
+    def _match_route(self, method, path):
+        if method == 'PUT' and path.startswith('/upload-session/'):
+            return 'upload_chunk', (path.split('/')[-1], )
+        if path.startswith(API_PREFIX):
+            path = path[len(API_PREFIX):]
+            for route_method, pattern, name in self.routes:
+                match = re.match(pattern, path)
+                if route_method == method and match:
+                    return name, match.groups()
+        return None, ()
+
+    def _throttle(self, nbytes):
+        bandwidth = self.state.faults.bandwidth
+        if bandwidth:
+            time.sleep(nbytes / bandwidth)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        chunks = []
+        while length > 0:
+            chunk = self.rfile.read(min(length, _IO_CHUNK_SIZE))
+            if not chunk:
+                break
+            self._throttle(len(chunk))
+            chunks.append(chunk)
+            length -= len(chunk)
+        return b''.join(chunks)
+
+    def _drop_connection(self):
+        self.close_connection = True
+        self.wfile.flush()
+        self.connection.shutdown(socket.SHUT_RDWR)
+
+    def send_json(self, data, status=200, headers={}):
+        self.send_bytes(json.dumps(data).encode('utf-8'),
+                        status=status,
+                        content_type='application/json',
+                        headers=headers)
+
+    def send_bytes(self, data, status=200, content_type='application/octet-stream',
+                   headers={}):
+        dropping = self.fault and self.fault[0] == 'drop'
+        if self.fault and self.fault[0] == 'corrupt' and data:
+            data = bytes([data[0] ^ 0xff]) + data[1:]
+        if dropping and not data:
+            return self._drop_connection()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        # Drop connection after sending half of the response body
+        end = len(data) // 2 if dropping else len(data)
+        for i in range(0, end, _IO_CHUNK_SIZE):
+            chunk = data[i:min(i + _IO_CHUNK_SIZE, end)]
+            self._throttle(len(chunk))
+            self.wfile.write(chunk)
+        if dropping:
+            self._drop_connection()
+
+    def send_page(self, items, path):
+        page = int(self.query.get('page', 1))
+        size = self.state.page_size
+        start = (page - 1) * size
+        next_url = None
+        if start + size < len(items):
+            query = dict(self.query, page=page + 1)
+            host = self.headers.get('Host')
+            next_url = f'http://{host}{API_PREFIX}{path}?{urlencode(query)}'
+        self.send_json(
+            dict(count=len(items),
+                 next=next_url,
+                 results=items[start:start + size]))
+
+    # Storage
+
+    def list_files(self):
+        pattern = self.query.get('path', '') or '*'
+        with self.state.lock:
+            paths = sorted(p for p in self.state.files
+                           if fnmatch.fnmatchcase(p, pattern))
+            files = [self.state.file_attributes(p) for p in paths]
+        self.send_json(files)
+
+    def get_file(self):
+        path = self.query.get('path')
+        if path not in self.state.files:
+            return self.send_json({'detail': 'Not found.'}, status=404)
+        self.send_json({'detail': self.state.file_attributes(path)})
+
+    def delete_file(self):
+        path = self.query.get('path')
+        with self.state.lock:
+            if self.state.files.pop(path, None) is None:
+                return self.send_json({'detail': 'Not found.'}, status=404)
+        self.send_bytes(b'', status=204)
+
+    def upload_file(self):
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            b'Content-Type: ' + self.headers['Content-Type'].encode() +
+            b'\r\n\r\n' + self.body)
+        fields = {
+            part.get_param('name', header='content-disposition'):
+            part.get_payload(decode=True)
+            for part in message.iter_parts()
+        }
+        path = fields['path'].decode('utf-8')
+        attrs = self.state.add_file(path, fields['file'])
+        self.send_json({'detail': attrs})
+
+    def create_resumable_upload(self):
+        host = self.headers.get('Host')
+        with self.state.lock:
+            id = str(next(self.state._ids))
+            self.state.sessions[id] = dict(path=self.query['path'],
+                                           data=bytearray())
+        self.send_json({'session_url': f'http://{host}/upload-session/{id}'})
+
+    def upload_chunk(self, id):
+        session = self.state.sessions.get(id)
+        match = _CONTENT_RANGE_RE.match(self.headers.get('Content-Range', ''))
+        if session is None or match is None:
+            return self.send_json({'detail': 'Invalid upload.'}, status=400)
+        start, _, total = match.groups()
+        data = session['data']
+        body = self.body
+        if self.fault and self.fault[0] == 'corrupt' and body:
+            # Store the chunk corrupted, as if damaged in transit
+            body = bytes([body[0] ^ 0xff]) + body[1:]
+        if start is not None and int(start) == len(data):
+            data.extend(body)
+        if total != '*' and len(data) >= int(total):
+            self.state.add_file(session['path'], bytes(data))
+            return self.send_json({'size': len(data)})
+        headers = {'Range': f'bytes=0-{len(data) - 1}'} if data else {}
+        self.send_bytes(b'', status=308, headers=headers)
+
+    def check_completed_file(self):
+        path = self.query.get('path')
+        if path not in self.state.files:
+            return self.send_json({'detail': 'Not found.'}, status=404)
+        self.send_json({'detail': 'ok'})
+
+    def download_file(self):
+        content = self.state.files.get(self.query.get('path'))
+        if content is None:
+            return self.send_json({'detail': 'Not found.'}, status=404)
+        headers = {'X-Goog-Hash': f'md5={_md5(content)}', 'Accept-Ranges': 'bytes'}
+        match = _RANGE_RE.match(self.headers.get('Range', ''))
+        if not match:
+            return self.send_bytes(content, headers=headers)
+        start = int(match.group(1))
+        end = min(int(match.group(2) or len(content) - 1), len(content) - 1)
+        if start > end:
+            return self.send_bytes(b'', status=416,
+                                   headers={'Content-Range': f'bytes */{len(content)}'})
+        headers['Content-Range'] = f'bytes {start}-{end}/{len(content)}'
+        del headers['X-Goog-Hash']
+        self.send_bytes(content[start:end + 1], status=206, headers=headers)
+
+    # Tasks
+
+    def list_tasks(self):
+        with self.state.lock:
+            tasks = [self.state.task_attributes(id) for id in sorted(self.state.tasks)]
+        self.send_page(tasks, '/tasks/')
+
+    def get_task(self, id):
+        if int(id) not in self.state.tasks:
+            return self.send_json({'detail': 'Not found.'}, status=404)
+        self.send_json(self.state.poll_task(int(id)))
+
+    def cancel_task(self, id):
+        with self.state.lock:
+            self.state.tasks[int(id)]['state'] = 'CANCELED'
+        self.send_json({'detail': 'ok'})
+
+    def list_artifacts(self, id):
+        self.send_json({'files': self.state.tasks[int(id)]['artifacts']})
+
+    # Models
+
+    def list_models(self, owner):
+        models = [m for (o, _), m in sorted(self.state.models.items()) if o == owner]
+        self.send_page(models, f'/users/{owner}/models/')
+
+    def get_model(self, owner, name):
+        model = self.state.models.get((owner, name))
+        if model is None:
+            return self.send_json({'detail': 'Not found.'}, status=404)
+        self.send_json(model)
+
+    def predict(self, owner, name, version):
+        params = json.loads(self.body or b'{}').get('parameters', {})
+        self.send_json(self.state.add_task(name=f'{owner}/{name}:{version}',
+                                           **params))
+
+
+class FakeAPIServer:
+    """Runs the fake API on a background thread.
+
+    Use it as a context manager::
+
+        with FakeAPIServer() as server:
+            os.environ["DYM_API_URL"] = server.url
+            ...
+
+    :param str host: address to bind to
+    :param int port: port to bind to (default: any free port)
+    :param int task_polls: number of times a task is fetched until finished
+    :param int page_size: number of items per page on paginated lists
+    :param Faults faults: faults to inject (default: none)
+
+    """
+    def __init__(self, host='127.0.0.1', port=0, **kwargs):
+        self.state = FakeAPIState(**kwargs)
+        self.httpd = ThreadingHTTPServer((host, port), FakeAPIHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self._thread = None
+
+    @property
+    def faults(self):
+        return self.state.faults
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever,
+                                        kwargs=dict(poll_interval=0.05),
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+if pytest is not None:
+
+    @pytest.fixture
+    def fake_api(monkeypatch):
+        """Runs a local fake API server and points the client to it"""
+        with FakeAPIServer(task_polls=2, page_size=10) as server:
+            monkeypatch.setenv("DYM_API_URL", server.url)
+            monkeypatch.setenv("DYM_API_KEY", "test")
+            yield server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--task-polls', type=int, default=2,
+                        help='times a task is fetched until it finishes')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--latency', type=float, default=0,
+                        help='seconds to wait before each response')
+    parser.add_argument('--bandwidth', type=float,
+                        help='maximum bytes per second per connection')
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help='probability of an error response')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--retry-after', type=float,
+                        help='Retry-After header value on error responses')
+    parser.add_argument('--drop-rate', type=float, default=0,
+                        help='probability of dropping a connection')
+    parser.add_argument('--routes', nargs='*',
+                        help='only inject random faults on these routes')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    faults = Faults(latency=args.latency,
+                    bandwidth=args.bandwidth,
+                    error_rate=args.error_rate,
+                    error_status=args.error_status,
+                    retry_after=args.retry_after,
+                    drop_rate=args.drop_rate,
+                    routes=args.routes,
+                    seed=args.seed)
+    server = FakeAPIServer(args.host,
+                           args.port,
+                           task_polls=args.task_polls,
+                           page_size=args.page_size,
+                           faults=faults)
+    print(f'Serving fake API on {server.url}')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,15 @@
+import io
+import time
+
 import requests
 from google.resumable_media.requests import ResumableUpload
 from google.resumable_media import common
+from google.resumable_media._helpers import calculate_retry_wait
 from six.moves import http_client
 
+from .ratelimit import UPLOAD, get_rate_limiter
+from .utils import DEFAULT_TIMEOUT, parse_retry_after
+
 _DEFAULT_RETRY_STRATEGY = common.RetryStrategy()
 RETRYABLE = (
     common.TOO_MANY_REQUESTS,
@@ -33,6 +40,28 @@ class CustomResumableUpload(ResumableUpload):
         self._resumable_url = resumable_url
         return True
 
+    @classmethod
+    def _transmit_chunk(cls, url, payload, headers):
+        """Sends a chunk, returning None if the connection failed or timed out"""
+        rate_limiter = get_rate_limiter()
+        rate_limiter.acquire(UPLOAD)
+        try:
+            # Not sent through the shared session: its adapter would retry
+            # failed chunks again, on top of the retries done here.
+            response = requests.put(
+                url,
+                data=payload,
+                headers=headers,
+                timeout=DEFAULT_TIMEOUT,
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            return None
+        if response.status_code in RETRYABLE:
+            retry_after = parse_retry_after(response)
+            if retry_after:
+                rate_limiter.cool_down(retry_after)
+        return response
+
     @classmethod
     def _transmit_chunk_wait_and_retry(
         cls,
@@ -41,12 +70,8 @@ class CustomResumableUpload(ResumableUpload):
         headers,
         retry_strategy=_DEFAULT_RETRY_STRATEGY,
     ):
-        response = requests.put(
-            url,
-            data=payload,
-            headers=headers,
-        )
-        if response.status_code not in RETRYABLE:
+        response = cls._transmit_chunk(url, payload, headers)
+        if response is not None and response.status_code not in RETRYABLE:
             return response
 
         total_sleep = 0.0
@@ -58,17 +83,103 @@ class CustomResumableUpload(ResumableUpload):
             num_retries += 1
             total_sleep += wait_time
             time.sleep(wait_time)
-            response = requests.put(
-                url,
-                data=payload,
-                headers=headers,
-            )
-            if response.status_code not in RETRYABLE:
+            response = cls._transmit_chunk(url, payload, headers)
+            if response is not None and response.status_code not in RETRYABLE:
                 return response
+        if response is None:
+            raise requests.ConnectionError(
+                f"could not transmit chunk after {num_retries} retries")
         return response
 
     def transmit_next_chunk(self):
         method, url, payload, headers = self._prepare_request()
         response = self._transmit_chunk_wait_and_retry(url, payload, headers)
         self._process_response(response, len(payload))
+        # Server may have stored only part of the chunk, resume from there
+        if not self.finished and self._stream.tell() != self.bytes_uploaded:
+            self._stream.seek(self.bytes_uploaded)
         return response
+
+
+class IterableStream(io.RawIOBase):
+    """Reads from a file object or an iterable of bytes, which may not be
+    seekable, as a stream that can be uploaded in chunks.
+
+    Only the bytes returned by the last :meth:`read` are kept in memory.
+    It is possible to seek back to any position within them (e.g. to send a
+    chunk again), but not further back.
+
+    :param source: file object or iterable of bytes
+
+    """
+
+    def __init__(self, source):
+        if hasattr(source, 'read'):
+            self._file = source
+            self._chunks = None
+        else:
+            self._file = None
+            self._chunks = iter(source)
+        self._pending = b''
+        self._last = b''
+        self._last_start = 0
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("can only seek relative to start or current position")
+        if not self._last_start <= offset <= self._last_start + len(self._last):
+            raise io.UnsupportedOperation("cannot seek outside of last read")
+        self._pos = offset
+        return offset
+
+    def read(self, size=-1):
+        buffered = self._last[self._pos - self._last_start:]
+        if size is None or size < 0:
+            more = self._pull(-1)
+        else:
+            more = self._pull(max(0, size - len(buffered)))
+        self._last = buffered + more
+        self._last_start = self._pos
+        data = self._last if size is None or size < 0 else self._last[:size]
+        self._pos += len(data)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def _pull(self, size):
+        """Reads ``size`` bytes from source (or less, at the end)"""
+        parts = [self._pending] if self._pending else []
+        total = len(self._pending)
+        while size < 0 or total < size:
+            if self._file is not None:
+                data = self._file.read(-1 if size < 0 else size - total)
+                if not data:
+                    break
+            else:
+                data = next(self._chunks, None)
+                if data is None:
+                    break
+            data = bytes(data)
+            parts.append(data)
+            total += len(data)
+        data = b''.join(parts)
+        if size < 0:
+            self._pending = b''
+            return data
+        self._pending = data[size:]
+        return data[:size]
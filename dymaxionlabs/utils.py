@@ -1,13 +1,23 @@
 import http
 import json
 import os
+import random
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from email.utils import parsedate_to_datetime
 from urllib.parse import urljoin, urlparse
 
 import requests
 from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.util.retry import Retry
 
+from .ratelimit import get_endpoint_class, get_rate_limiter
+
 DEFAULT_TIMEOUT = 30  # seconds
+DEFAULT_POOL_SIZE = 32  # connections per host
+DEFAULT_MAX_WORKERS = 8  # threads used for concurrent transfers
+DOWNLOAD_CHUNK_SIZE = 2**20  # 1MB
 
 
 class TimeoutHTTPAdapter(HTTPAdapter):
@@ -25,20 +35,201 @@ class TimeoutHTTPAdapter(HTTPAdapter):
         return super().send(request, **kwargs)
 
 
+class RateLimitedRetry(Retry):
+    """A Retry strategy that, when the API sends a ``Retry-After`` header,
+    makes all requests wait (see :meth:`RateLimiter.cool_down`) instead of
+    only retrying this one after sleeping."""
+    def sleep_for_retry(self, response=None):
+        retry_after = self.get_retry_after(response) if response else None
+        if retry_after:
+            rate_limiter = get_rate_limiter()
+            rate_limiter.cool_down(retry_after)
+            rate_limiter.wait()
+            return True
+        return False
+
+
 # Set debug level
 #http.client.HTTPConnection.debuglevel = 1
 
 # Setup a Retry strategy, with exponential backoff
-retry_strategy = Retry(
+retry_strategy = RateLimitedRetry(
     total=3,
     backoff_factor=1,
     status_forcelist=[413, 429, 500, 502, 503, 504],
     method_whitelist=["HEAD", "GET", "PUT", "DELETE", "OPTIONS", "TRACE"])
-adapter = TimeoutHTTPAdapter(max_retries=retry_strategy)
-session = requests.Session()
 
-session.mount("https://", adapter)
-session.mount("http://", adapter)
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def _create_session():
+    adapter = TimeoutHTTPAdapter(max_retries=retry_strategy,
+                                 pool_maxsize=DEFAULT_POOL_SIZE)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    """Gets the HTTP session used by all requests to the API.
+
+    The session is created on first use, and again in each process, so
+    forked processes (e.g. workers of a process pool) never share pooled
+    connections with their parent.
+
+    :rtype: requests.Session
+
+    """
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _create_session()
+                _session_pid = pid
+    return _session
+
+
+def _reset_session_after_fork():
+    global _session, _session_pid, _session_lock
+    # Do not close the parent's connections, only forget them
+    _session = None
+    _session_pid = None
+    _session_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_session_after_fork)
+
+
+def __getattr__(name):
+    # ``session`` used to be a module attribute, created at import time
+    if name == 'session':
+        return get_session()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class _NoExtraAttributes(Mapping):
+    """An empty, read-only mapping.  Unlike ``MappingProxyType({})``, it can
+    be pickled, e.g. to send entities to other processes."""
+
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __repr__(self):
+        return '{}'
+
+    def __reduce__(self):
+        return 'NO_EXTRA_ATTRIBUTES'
+
+
+# Shared by entities without extra attributes, to avoid one dict per instance
+NO_EXTRA_ATTRIBUTES = _NoExtraAttributes()
+
+
+class EntityList(Sequence):
+    """A compact, read-only list of entities, stored by columns.
+
+    Instead of holding one Python object per entity, attribute values are
+    stored in one list per field, and entities are built on access.  Large
+    listings can be exported to pandas or Arrow without building per-row
+    objects.
+
+    Subclasses must define ``entity_class`` and its ``fields``.
+
+    :param iterable records: attribute dictionaries, as returned by the API
+
+    """
+
+    entity_class = None
+    fields = ()
+
+    def __init__(self, records=()):
+        self._columns = {field: [] for field in self.fields}
+        self._extra_attributes = []
+        for attrs in records:
+            self._append(attrs)
+
+    def _append(self, attrs):
+        attrs = dict(attrs)
+        for field, column in self._columns.items():
+            column.append(attrs.pop(field, None))
+        self._extra_attributes.append(attrs or None)
+
+    def _attributes(self, i):
+        attrs = {field: column[i] for field, column in self._columns.items()}
+        if self._extra_attributes[i]:
+            attrs.update(self._extra_attributes[i])
+        return attrs
+
+    def column(self, field):
+        """Returns all values of ``field``, without building entities.
+
+        :param str field: field name
+        :rtype: list
+
+        """
+        return self._columns[field]
+
+    def to_dicts(self):
+        """Returns a list of attribute dictionaries, one per entity.
+
+        :rtype: list
+
+        """
+        return [self._attributes(i) for i in range(len(self))]
+
+    def to_pandas(self):
+        """Exports entities to a pandas DataFrame, one column per field.
+
+        Requires ``pandas`` to be installed.
+
+        :rtype: pandas.DataFrame
+
+        """
+        import pandas as pd
+        return pd.DataFrame(self._columns, columns=list(self.fields))
+
+    def to_arrow(self):
+        """Exports entities to an Arrow Table, one column per field.
+
+        Requires ``pyarrow`` to be installed.
+
+        :rtype: pyarrow.Table
+
+        """
+        import pyarrow as pa
+        return pa.table(self._columns)
+
+    def __len__(self):
+        return len(self._extra_attributes)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            res = type(self)()
+            for field, column in self._columns.items():
+                res._columns[field] = column[i]
+            res._extra_attributes = self._extra_attributes[i]
+            return res
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(f"{type(self).__name__} index out of range")
+        return self.entity_class(**self._attributes(i))
+
+    def __repr__(self):
+        return f"<{type(self).__module__}.{type(self).__name__} len={len(self)}>"
 
 
 class BadRequestError(Exception):
@@ -53,6 +244,35 @@ class NotFoundError(Exception):
     pass
 
 
+class ChecksumMismatchError(Exception):
+    """Raised when a transferred file does not match its expected checksum
+    (or size)"""
+    def __init__(self, path, algorithm, expected, actual):
+        super().__init__(f"{algorithm} mismatch for {path}: "
+                         f"expected {expected}, got {actual}")
+        self.path = path
+        self.algorithm = algorithm
+        self.expected = expected
+        self.actual = actual
+
+    def __reduce__(self):
+        return (type(self), (self.path, self.algorithm, self.expected, self.actual))
+
+
+class TooManyRequestsError(BadRequestError):
+    """Raised when the API rate limit was exceeded (429)"""
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ServiceUnavailableError(InternalServerError):
+    """Raised when the API is temporarily unavailable (503)"""
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 def get_api_url():
     """Get current API URL from environment"""
     return os.getenv("DYM_API_URL", "https://api.dymaxionlabs.com/")
@@ -62,6 +282,13 @@ def get_api_key():
     """Get current API Key from environment"""
     return os.environ.get("DYM_API_KEY")
 
+
+def get_cache_dir():
+    """Get local cache directory from environment"""
+    return os.getenv(
+        "DYM_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "dymaxionlabs"))
+
 API_VERSION = 'v1'
 
 def request(method,
@@ -71,11 +298,18 @@ def request(method,
             params={},
             headers={},
             binary=False,
-            parse_response=True):
-    """Makes an HTTP request to the API"""
+            parse_response=True,
+            stream=False):
+    """Makes an HTTP request to the API
+
+    If ``stream`` is True, the response body is not read, and the
+    :class:`requests.Response` is returned instead of its content.
+
+    """
     headers = {'Authorization': 'Api-Key {}'.format(get_api_key()), **headers}
-    request_method = getattr(session, method)
+    request_method = getattr(get_session(), method)
     url = urljoin(get_api_url(), f"/{API_VERSION}{path}")
+    get_rate_limiter().acquire(get_endpoint_class(path))
     if files:
         response = request_method(url,
                                   files=files,
@@ -87,17 +321,28 @@ def request(method,
             response = request_method(url,
                                       data=body,
                                       params=params,
-                                      headers=headers)
+                                      headers=headers,
+                                      stream=stream)
         else:
             response = request_method(url,
                                       json=body,
                                       params=params,
                                       headers=headers)
     code = response.status_code
+    if code in (429, 503):
+        retry_after = parse_retry_after(response)
+        if retry_after:
+            get_rate_limiter().cool_down(retry_after)
 
     # Error handling
     if code == 404:
         raise NotFoundError(response.text)
+    elif code == 429:
+        raise TooManyRequestsError(response.text,
+                                   retry_after=parse_retry_after(response))
+    elif code == 503:
+        raise ServiceUnavailableError(response.text,
+                                      retry_after=parse_retry_after(response))
     elif code in range(400, 500):
         raise BadRequestError(response.text)
     elif code in range(500, 600):
@@ -107,6 +352,9 @@ def request(method,
     if code == 204:
         return
 
+    if stream:
+        return response
+
     # Otherwise, parse json response and return
     if parse_response:
         return json.loads(response.text)
@@ -114,14 +362,61 @@ def request(method,
         return response.content
 
 
+def parse_retry_after(response):
+    """Returns the number of seconds to wait from the ``Retry-After`` header
+    of ``response``, or None if it is not present or invalid"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return
+
+
+def retry_on_throttle(func, *args, max_retries=8, max_wait=60, **kwargs):
+    """Calls ``func`` and retries when the API is throttling requests.
+
+    On :class:`TooManyRequestsError` or :class:`ServiceUnavailableError`,
+    waits for as long as the ``Retry-After`` header says, or uses exponential
+    backoff with jitter if it is not present, up to ``max_retries`` times.
+
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return func(*args, **kwargs)
+        except (TooManyRequestsError, ServiceUnavailableError) as err:
+            if attempt == max_retries:
+                raise err
+            wait = err.retry_after
+            if wait is None:
+                wait = random.uniform(0, 2**attempt)
+            time.sleep(min(wait, max_wait))
+
+
+def iter_list_request(path, params={}):
+    """Iterates over all entities from a list request, fetching one page at a
+    time if the result is paginated"""
+    while path:
+        response = request('get', path, params=params)
+        if isinstance(response, list):
+            yield from response
+            return
+        yield from response['results']
+        path = None
+        if response['next']:
+            p = urlparse(response['next'])
+            next_path = p.path
+            # Next page URL includes the API version prefix, added by request()
+            if next_path.startswith(f'/{API_VERSION}/'):
+                next_path = next_path[len(API_VERSION) + 1:]
+            path = '{}?{}#{}'.format(next_path, p.query, p.fragment)
+
+
 def fetch_from_list_request(path, params={}):
     """Fetches all entities from a paginated result"""
-    res = []
-    response = request('get', path, params=params)
-    res.extend(response['results'])
-    if response['next']:
-        p = urlparse(response['next'])
-        new_path = '{}?{}#{}'.format(p.path, p.query, p.fragment)
-        next_items = fetch_from_list_request(path=new_path, params=params)
-        res.extend(next_items)
-    return res
+    return list(iter_list_request(path, params=params))
@@ -7,4 +7,7 @@
     https://pytest.org/latest/plugins.html
 """
 
-# import pytest
+# The fake_api fixture is shipped with the package, for use in other suites
+from dymaxionlabs.testing import fake_api  # noqa: F401
+
+pytest_plugins = ["pytester"]
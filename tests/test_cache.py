@@ -0,0 +1,102 @@
+import os
+
+from dymaxionlabs.cache import DiskCache, DownloadCache, fingerprint_metadata
+from dymaxionlabs.files import File
+
+__author__ = "Dymaxion Labs"
+__copyright__ = "Dymaxion Labs"
+__license__ = "apache-2.0"
+
+
+def test_disk_cache(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.set("foo", {"a": 1})
+    assert cache.get("foo") == {"a": 1}
+    assert cache.get("foo", ttl=-1) is None
+    cache.delete("foo")
+    assert cache.get("foo") is None
+
+
+def test_fingerprint_metadata():
+    assert fingerprint_metadata(None) is None
+    assert fingerprint_metadata({"size": 10}) is None
+    assert fingerprint_metadata({"size": 10, "etag": "a"}) != \
+        fingerprint_metadata({"size": 10, "etag": "b"})
+
+
+def write(path, content):
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_download_cache_lru_eviction(tmp_path):
+    cache = DownloadCache(str(tmp_path / "cache"), max_size=250)
+    for name in ("a", "b", "c"):
+        src = write(tmp_path / name, name.encode() * 100)
+        cache.put(name, {"etag": name}, src)
+    # Oldest entry was evicted
+    assert cache.size == 200
+    assert not cache.get("a", {"etag": "a"}, str(tmp_path / "out_a"))
+
+    out = tmp_path / "out_b"
+    assert cache.get("b", {"etag": "b"}, str(out))
+    assert out.read_bytes() == b"b" * 100
+    # A different version of the same file is a miss
+    assert not cache.get("b", {"etag": "other"}, str(out))
+
+    # "b" was used recently, so "c" is evicted
+    cache.put("d", {"etag": "d"}, write(tmp_path / "d", b"d" * 100))
+    assert not cache.get("c", {"etag": "c"}, str(tmp_path / "out_c"))
+    assert cache.get("b", {"etag": "b"}, str(tmp_path / "out_b2"))
+
+
+def test_download_cache_copy(tmp_path):
+    cache = DownloadCache(str(tmp_path / "cache"), link=False)
+    cache.put("a", {"etag": "a"}, write(tmp_path / "a", b"a"))
+    out = tmp_path / "out"
+    assert cache.get("a", {"etag": "a"}, str(out))
+    assert os.stat(out).st_ino != os.stat(tmp_path / "a").st_ino
+    assert out.read_bytes() == b"a"
+
+
+def test_download_with_cache(fake_api, tmp_path, monkeypatch):
+    monkeypatch.setenv("DYM_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("DYM_DOWNLOAD_CACHE", "1")
+    fake_api.state.add_file("layers/base.tif", b"x" * 1000)
+    file = File.get("layers/base.tif")
+    first = file.download(str(tmp_path / "job1"))
+    second = file.download(str(tmp_path / "job2"))
+    assert open(second, "rb").read() == open(first, "rb").read()
+    assert fake_api.state.requests["download_file"] == 1
+    # Both the downloaded file and the cache hit are links to the cached file
+    assert os.stat(first).st_ino == os.stat(second).st_ino
+    assert not os.stat(first).st_mode & 0o222
+
+    # Changed files are downloaded again
+    fake_api.state.add_file("layers/base.tif", b"y" * 1000)
+    file = File.get("layers/base.tif")
+    third = file.download(str(tmp_path / "job3"))
+    assert open(third, "rb").read() == b"y" * 1000
+    assert fake_api.state.requests["download_file"] == 2
+
+
+def test_download_after_cache_hit_and_remote_change(fake_api, tmp_path, monkeypatch):
+    monkeypatch.setenv("DYM_CACHE_DIR", str(tmp_path / "cache"))
+    fake_api.state.add_file("layers/base.tif", b"x" * 1000)
+    out = str(tmp_path / "job")
+    # First download fills the cache, second one is a hit (a hard link)
+    old = File.get("layers/base.tif")
+    old.download(out, cache=True)
+    output_file = old.download(out, cache=True)
+    assert fake_api.state.requests["download_file"] == 1
+
+    # A changed file is downloaded into the same path...
+    fake_api.state.add_file("layers/base.tif", b"y" * 1000)
+    File.get("layers/base.tif").download(out, cache=True)
+    assert open(output_file, "rb").read() == b"y" * 1000
+    assert os.listdir(out) == ["base.tif"]
+
+    # ...without modifying the cached copy of the previous version
+    old.download(str(tmp_path / "old"), cache=True)
+    assert open(tmp_path / "old" / "base.tif", "rb").read() == b"x" * 1000
+    assert fake_api.state.requests["download_file"] == 2
@@ -0,0 +1,45 @@
+import io
+import unittest
+
+from dymaxionlabs.checksums import (Checksums, HashingReader,
+                                    checksums_from_headers,
+                                    checksums_from_metadata)
+from dymaxionlabs.utils import ChecksumMismatchError
+
+__author__ = "Dymaxion Labs"
+__copyright__ = "Dymaxion Labs"
+__license__ = "apache-2.0"
+
+FOO_MD5 = "rL0Y20zC+Fzt72VPzMSk2A=="
+
+
+class ChecksumsTest(unittest.TestCase):
+    def test_verify(self):
+        checksums = Checksums(['md5'])
+        checksums.update(b"f")
+        checksums.update(b"oo")
+        self.assertTrue(checksums.verify(dict(md5=FOO_MD5)))
+        self.assertFalse(checksums.verify({}))
+        with self.assertRaises(ChecksumMismatchError):
+            checksums.verify(dict(md5="AAAAAAAAAAAAAAAAAAAAAA=="))
+
+    def test_hashing_reader_hashes_once(self):
+        checksums = Checksums(['md5'])
+        reader = HashingReader(io.BytesIO(b"foo"), checksums)
+        reader.read(2)
+        reader.seek(1)
+        reader.read(2)
+        reader.seek(0)
+        reader.read()
+        self.assertEqual(checksums.digests()['md5'], FOO_MD5)
+
+    def test_expected_checksums(self):
+        self.assertDictEqual(
+            checksums_from_metadata(
+                dict(md5Hash="acbd18db4cc2f85cedef654fccc4a4d8",
+                     crc32c="abc=")), dict(md5=FOO_MD5, crc32c="abc="))
+        self.assertDictEqual(checksums_from_metadata("foo"), {})
+        self.assertDictEqual(
+            checksums_from_headers(
+                {'X-Goog-Hash': f'crc32c=abc=, md5={FOO_MD5}'}),
+            dict(md5=FOO_MD5, crc32c="abc="))
@@ -0,0 +1,81 @@
+import os
+
+from dymaxionlabs.cli import main
+from dymaxionlabs.files import File
+
+__author__ = "Dymaxion Labs"
+__copyright__ = "Dymaxion Labs"
+__license__ = "apache-2.0"
+
+
+def test_cp_roundtrip(fake_api, tmp_path, capsys):
+    src = tmp_path / "images"
+    (src / "sub").mkdir(parents=True)
+    (src / "a.tif").write_bytes(b"a" * 100)
+    (src / "sub" / "b.tif").write_bytes(b"b" * 200)
+
+    assert main(["cp", "-r", "--progress", "none", str(src), "dym:data/"]) == 0
+    assert sorted(fake_api.state.files) == ["data/images/a.tif", "data/images/sub/b.tif"]
+
+    out = tmp_path / "out"
+    assert main(["cp", "-r", "--progress", "none", "dym:data/images", str(out)]) == 0
+    assert (out / "a.tif").read_bytes() == b"a" * 100
+    assert (out / "sub" / "b.tif").read_bytes() == b"b" * 200
+
+    # Existing files with the same size are not uploaded again
+    uploads = fake_api.state.requests["upload_file"]
+    assert main(["sync", "--progress", "none", str(src), "dym:data/"]) == 0
+    assert fake_api.state.requests["upload_file"] == uploads
+
+
+def test_ls_and_rm(fake_api, capsys):
+    fake_api.state.add_file("tmp/a.tif", b"a")
+    fake_api.state.add_file("tmp/b.tif", b"bb")
+    fake_api.state.add_file("keep.tif", b"c")
+
+    assert main(["ls", "-l", "dym:tmp/*"]) == 0
+    out = capsys.readouterr().out.splitlines()
+    assert [line.split() for line in out] == [["1", "dym:tmp/a.tif"], ["2", "dym:tmp/b.tif"]]
+
+    assert main(["rm", "--dry-run", "dym:tmp/*"]) == 0
+    assert len(fake_api.state.files) == 3
+    assert main(["rm", "dym:tmp/*"]) == 0
+    assert list(fake_api.state.files) == ["keep.tif"]
+
+
+def test_ls_and_rm_with_prefixes(fake_api, capsys):
+    for row in ("0", "1", "2"):
+        fake_api.state.add_file(f"tiles/{row}/a.tif", b"a")
+
+    fake_api.state.requests.clear()
+    assert main(["ls", "dym:tiles/*/*.tif", "--prefix", "0", "--prefix", "1"]) == 0
+    out = sorted(capsys.readouterr().out.splitlines())
+    assert out == ["dym:tiles/0/a.tif", "dym:tiles/1/a.tif"]
+    assert fake_api.state.requests["list_files"] == 2
+
+    assert main(["rm", "dym:tiles/*/*.tif", "--prefix", "2", "-j", "2"]) == 0
+    assert sorted(fake_api.state.files) == ["tiles/0/a.tif", "tiles/1/a.tif"]
+
+
+def test_predict_and_wait(fake_api, capsys):
+    fake_api.state.add_model("dym", "pools")
+    assert main(["predict", "dym/pools", "dym:images/", "-p", "threshold=0.5",
+                 "--wait", "--interval", "0"]) == 0
+    task_id = capsys.readouterr().out.splitlines()[0]
+    assert main(["wait", task_id, "--interval", "0"]) == 0
+
+    failed = fake_api.state.add_task(state="FAILED")
+    assert main(["wait", str(failed["id"]), "--interval", "0"]) == 1
+
+
+def test_cp_requires_remote_path(tmp_path):
+    assert main(["cp", str(tmp_path), str(tmp_path / "out")]) == 1
+
+
+def test_download_many_reports_errors(fake_api, tmp_path):
+    fake_api.state.add_file("a.bin", b"a" * 10)
+    files = [File.get("a.bin"), File("missing.bin", "missing.bin", {})]
+    report = File.download_many([(f, str(tmp_path / f.name)) for f in files], progress=False)
+    assert report["a.bin"] == str(tmp_path / "a.bin")
+    assert isinstance(report["missing.bin"], Exception)
+    assert os.path.exists(tmp_path / "a.bin")
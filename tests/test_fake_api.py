@@ -0,0 +1,151 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from dymaxionlabs.files import File
+from dymaxionlabs.models import Model
+from dymaxionlabs.tasks import Task
+from dymaxionlabs.utils import ChecksumMismatchError
+
+__author__ = "Dymaxion Labs"
+__copyright__ = "Dymaxion Labs"
+__license__ = "apache-2.0"
+
+
+def write_file(tmp_path, name, size):
+    path = tmp_path / name
+    content = os.urandom(size)
+    path.write_bytes(content)
+    return str(path), content
+
+
+@patch("dymaxionlabs.upload.time.sleep")
+def test_resumable_upload_with_faults(mock_sleep, fake_api, tmp_path):
+    path, content = write_file(tmp_path, "large.bin", 3 * 2**20 + 123)
+    fake_api.faults.fail_next("upload_chunk", status=503)
+    fake_api.faults.drop_next("upload_chunk")
+    fake_api.faults.fail_next("upload_chunk", status=429, retry_after=0)
+    file = File.upload(path, "foo/")
+    assert file.path == "foo/large.bin"
+    assert fake_api.state.files["foo/large.bin"] == content
+    assert mock_sleep.call_count == 3
+
+
+def test_upload_download(fake_api, tmp_path):
+    path, content = write_file(tmp_path, "small.bin", 1000)
+    file = File.upload(path, "foo/")
+    fake_api.faults.fail_next("download_file", status=503, retry_after=0)
+    output_file = file.download(str(tmp_path / "out"))
+    with open(output_file, "rb") as f:
+        assert f.read() == content
+
+
+def test_wait_until_finished(fake_api):
+    fake_api.state.add_model("dym", "pools")
+    task = Model.get("dym/pools").predict("foo/")
+    fake_api.faults.fail_next("get_task", status=429, retry_after=0)
+    task.wait_until_finished(interval=0)
+    assert task.state == "FINISHED"
+    assert fake_api.state.requests["get_task"] == 3
+
+
+def test_paginated_list(fake_api):
+    for _ in range(25):
+        fake_api.state.add_task(state="FINISHED")
+    tasks = Task.all()
+    assert isinstance(tasks, list)
+    assert len(tasks) == 25
+    assert fake_api.state.requests["list_tasks"] == 3
+    assert len(Task.all(columnar=True).column("id")) == 25
+
+
+def test_iter_all(fake_api):
+    names = ["00", "a1", "Zz", "_x", ".hidden", "tile"]
+    for name in names:
+        fake_api.state.add_file(f"tiles/{name}/image.tif", b"")
+        fake_api.state.add_file(f"tiles/{name}/image.json", b"")
+    pattern = "tiles/*/*.tif"
+    expected = sorted(f.path for f in File.all(pattern))
+    assert len(expected) == len(names)
+
+    # Without prefixes, the pattern is listed with a single request
+    fake_api.state.requests.clear()
+    assert sorted(f.path for f in File.iter_all(pattern)) == expected
+    assert fake_api.state.requests["list_files"] == 1
+
+    # With prefixes, one request per directory
+    fake_api.state.requests.clear()
+    paths = sorted(f.path for f in File.iter_all(pattern, parallelism=4, prefixes=names))
+    assert paths == expected
+    assert fake_api.state.requests["list_files"] == len(names)
+
+
+def test_delete_many(fake_api):
+    for i in range(20):
+        fake_api.state.add_file(f"tmp/{i:02d}.tif", b"")
+    fake_api.state.add_file("keep/00.tif", b"")
+    report = File.delete_many("tmp/*.tif", max_workers=4)
+    assert len(report) == 20
+    assert not any(report.values())
+    assert list(fake_api.state.files) == ["keep/00.tif"]
+
+
+def test_download_retries_corrupted_and_dropped(fake_api, tmp_path):
+    fake_api.state.add_file("foo/data.bin", os.urandom(100000))
+    file = File.get("foo/data.bin")
+    fake_api.faults.corrupt_next("download_file")
+    fake_api.faults.drop_next("download_file")
+    output_file = file.download(str(tmp_path))
+    with open(output_file, "rb") as f:
+        assert f.read() == fake_api.state.files["foo/data.bin"]
+    assert fake_api.state.requests["download_file"] == 3
+
+
+def test_download_fails_when_always_corrupted(fake_api, tmp_path):
+    fake_api.state.add_file("foo/data.bin", os.urandom(1000))
+    file = File.get("foo/data.bin")
+    fake_api.faults.corrupt_next("download_file", times=3)
+    with pytest.raises(ChecksumMismatchError):
+        file.download(str(tmp_path))
+    assert not os.path.exists(tmp_path / "data.bin")
+
+
+def test_download_with_stale_metadata(fake_api, tmp_path):
+    fake_api.state.add_file("foo/data.bin", os.urandom(1000))
+    file = File.get("foo/data.bin")
+    fake_api.state.add_file("foo/data.bin", os.urandom(2000))
+    output_file = file.download(str(tmp_path))
+    with open(output_file, "rb") as f:
+        assert f.read() == fake_api.state.files["foo/data.bin"]
+    assert fake_api.state.requests["download_file"] == 1
+
+
+def test_resumable_upload_retries_corrupted(fake_api, tmp_path):
+    path, content = write_file(tmp_path, "large.bin", 2 * 2**20 + 1)
+    fake_api.faults.corrupt_next("upload_chunk")
+    file = File.upload(path, "foo/")
+    assert fake_api.state.files[file.path] == content
+    assert fake_api.state.requests["delete_file"] == 1
+
+
+def test_corrupted_stream_upload_is_deleted(fake_api):
+    content = os.urandom(2 * 2**20 + 1)
+    fake_api.faults.corrupt_next("upload_chunk")
+    with pytest.raises(ChecksumMismatchError):
+        File.upload_stream(iter([content]), "foo/large.bin")
+    assert "foo/large.bin" not in fake_api.state.files
+
+
+def test_fake_api_plugin(pytester):
+    pytester.makeconftest('pytest_plugins = ["dymaxionlabs.testing"]')
+    pytester.makepyfile("""
+        from dymaxionlabs.files import File
+
+        def test_upload(fake_api, tmp_path):
+            path = tmp_path / "a.bin"
+            path.write_bytes(b"a")
+            File.upload(str(path), "foo/")
+            assert fake_api.state.files["foo/a.bin"] == b"a"
+    """)
+    pytester.runpytest("-p", "no:cacheprovider").assert_outcomes(passed=1)
@@ -3,7 +3,8 @@ from unittest.mock import patch
 
 from requests.utils import quote
 
-from dymaxionlabs.files import File
+from dymaxionlabs.files import File, FileList, _partition_pattern
+from dymaxionlabs.utils import NotFoundError
 
 __author__ = "Dymaxion Labs"
 __copyright__ = "Dymaxion Labs"
@@ -36,6 +37,10 @@ class FileTest(unittest.TestCase):
         self.assertListEqual(names, ['foo', 'bar'])
         # test received file paths
         self.assertListEqual(paths, ['/foo', '/bar'])
+        # a plain list is returned, unless columnar storage is requested
+        self.assertIsInstance(rv, list)
+        self.assertIs(rv[0], rv[0])
+        self.assertIsInstance(File.all(columnar=True), FileList)
 
     @patch("dymaxionlabs.files.request")
     def test_get(self, mock_request):
@@ -62,3 +67,51 @@ class FileTest(unittest.TestCase):
                                              '/storage/file/',
                                              params=dict(path='/foo'))
         self.assertTrue(rv)
+
+    def test_file_list(self):
+        rv = FileList([
+            {'name': 'foo', 'path': '/foo', 'metadata': None},
+            {'name': 'bar', 'path': '/bar', 'metadata': None, 'size': 3},
+        ])
+        self.assertEqual(len(rv), 2)
+        self.assertListEqual(rv.column('path'), ['/foo', '/bar'])
+        self.assertEqual(rv[-1].path, '/bar')
+        self.assertEqual(rv[1].extra_attributes, {'size': 3})
+        self.assertEqual(rv[0].extra_attributes, {})
+        self.assertListEqual([f.name for f in rv[1:]], ['bar'])
+        with self.assertRaises(IndexError):
+            rv[2]
+        self.assertFalse(hasattr(rv[0], '__dict__'))
+
+    def test_partition_pattern(self):
+        self.assertListEqual(_partition_pattern("tiles/*/*.tif"), ["tiles/*/*.tif"])
+        self.assertListEqual(_partition_pattern("tiles/*/*.tif", ["0", "1"]),
+                             ["tiles/0/*.tif", "tiles/1/*.tif"])
+        # Only whole directory components are partitioned
+        self.assertListEqual(_partition_pattern("tiles/*.tif", ["0"]), ["tiles/*.tif"])
+        self.assertListEqual(_partition_pattern("tiles/a*/x", ["a0"]), ["tiles/a*/x"])
+        self.assertListEqual(_partition_pattern("tiles/0/x", ["0"]), ["tiles/0/x"])
+        with self.assertRaises(ValueError):
+            _partition_pattern("tiles/*/x", ["a/b"])
+
+    @patch("dymaxionlabs.files.request")
+    def test_delete_many(self, mock_request):
+        error = NotFoundError("not found")
+        mock_request.side_effect = lambda method, path, params: \
+            self._raise(error) if params['path'] == '/bar' else None
+        rv = File.delete_many([File('foo', '/foo', None), '/bar', '/baz'])
+        self.assertDictEqual(rv, {'/foo': None, '/bar': error, '/baz': None})
+        self.assertEqual(mock_request.call_count, 3)
+        mock_request.assert_any_call('delete',
+                                     '/storage/file/',
+                                     params=dict(path='/baz'))
+
+    @patch("dymaxionlabs.files.request")
+    def test_delete_many_dry_run(self, mock_request):
+        rv = File.delete_many(['/foo', '/bar'], dry_run=True)
+        self.assertDictEqual(rv, {'/foo': None, '/bar': None})
+        mock_request.assert_not_called()
+
+    @staticmethod
+    def _raise(error):
+        raise error
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from dymaxionlabs.index import TaskIndex
+
+__author__ = "Dymaxion Labs"
+__copyright__ = "Dymaxion Labs"
+__license__ = "apache-2.0"
+
+
+def task_attrs(id, state, updated_at, name="predict"):
+    return dict(id=id,
+                name=name,
+                state=state,
+                created_at=updated_at,
+                updated_at=updated_at,
+                finished_at=None,
+                duration=None,
+                estimated_duration=None,
+                metadata=None,
+                error=None,
+                args=None,
+                kwargs=None)
+
+
+class TaskIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.index = TaskIndex(os.path.join(self.tmpdir.name, 'tasks.db'))
+
+    def tearDown(self):
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    @patch("dymaxionlabs.index.iter_list_request")
+    def test_sync(self, mock_iter):
+        mock_iter.return_value = iter([
+            task_attrs(2, "RUNNING", "2022-06-02T10:00:00Z"),
+            task_attrs(1, "FINISHED", "2022-06-01T10:00:00Z"),
+        ])
+        self.assertEqual(self.index.sync(), 2)
+        mock_iter.assert_called_once_with(
+            '/tasks/', params=dict(ordering='-updated_at'))
+        self.assertEqual(self.index.watermark, "2022-06-02T10:00:00Z")
+
+        mock_iter.reset_mock()
+        mock_iter.return_value = iter([
+            task_attrs(2, "FAILED", "2022-06-03T10:00:00Z"),
+        ])
+        self.assertEqual(self.index.sync(), 1)
+        mock_iter.assert_called_once_with(
+            '/tasks/',
+            params=dict(ordering='-updated_at',
+                        updated_at__gte="2022-06-02T10:00:00Z"))
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(self.index.get(2).state, "FAILED")
+        self.assertEqual(self.index.watermark, "2022-06-03T10:00:00Z")
+
+    @patch("dymaxionlabs.index.iter_list_request")
+    def test_sync_stops_at_watermark(self, mock_iter):
+        mock_iter.return_value = iter([task_attrs(1, "RUNNING", "2022-06-01T10:00:00Z")])
+        self.index.sync()
+
+        # Server ignores the filter, and returns old tasks too
+        records = iter([
+            task_attrs(2, "RUNNING", "2022-06-02T10:00:00Z"),
+            task_attrs(1, "RUNNING", "2022-06-01T10:00:00Z"),
+            task_attrs(0, "FINISHED", "2022-05-01T10:00:00Z"),
+            task_attrs(-1, "FINISHED", "2022-04-01T10:00:00Z"),
+        ])
+        mock_iter.return_value = records
+        with self.assertLogs("dymaxionlabs.index", level="WARNING"):
+            self.assertEqual(self.index.sync(), 2)
+        # Listing stopped at the first task older than the watermark
+        self.assertEqual(next(records)["id"], -1)
+        self.assertIsNone(self.index.get(0))
+        self.assertEqual(self.index.watermark, "2022-06-02T10:00:00Z")
+
+    @patch("dymaxionlabs.index.iter_list_request")
+    def test_query(self, mock_iter):
+        mock_iter.return_value = [
+            task_attrs(1, "FINISHED", "2022-06-01T10:00:00Z"),
+            task_attrs(2, "FAILED", "2022-06-02T10:00:00Z"),
+            task_attrs(3, "FINISHED", "2022-06-03T10:00:00Z", name="tiling"),
+        ]
+        self.index.sync()
+        self.assertListEqual(
+            [t.id for t in self.index.query(state="FINISHED")], [1, 3])
+        self.assertListEqual(
+            [t.id for t in self.index.query(name="predict")], [1, 2])
+        self.assertListEqual([
+            t.id for t in self.index.query(since="2022-06-02",
+                                           until="2022-06-03")
+        ], [2])
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from dymaxionlabs.models import Model
+from dymaxionlabs.utils import TooManyRequestsError
+
+__author__ = "Dymaxion Labs"
+__copyright__ = "Dymaxion Labs"
+__license__ = "apache-2.0"
+
+
+class ModelTest(unittest.TestCase):
+    def setUp(self):
+        self.model = Model(owner="dym",
+                           name="pools",
+                           version="1.0",
+                           description="",
+                           tags=[],
+                           repo_url=None,
+                           is_public=True)
+
+    @patch("dymaxionlabs.models.request")
+    def test_get(self, mock_request):
+        mock_request.return_value = dict(owner="dym",
+                                         name="pools",
+                                         description="",
+                                         tags=[],
+                                         repo_url=None,
+                                         is_public=True,
+                                         latest_version="2.0")
+        rv = Model.get("dym/pools")
+        mock_request.assert_called_once_with('get', '/users/dym/models/pools/')
+        self.assertEqual(rv.version, "2.0")
+        self.assertEqual(rv.extra_attributes, dict(latest_version="2.0"))
+
+    @patch("dymaxionlabs.models.request")
+    def test_get_cached(self, mock_request):
+        mock_request.return_value = dict(owner="dym",
+                                         name="pools",
+                                         description="",
+                                         tags=[],
+                                         repo_url=None,
+                                         is_public=True,
+                                         latest_version="2.0")
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with patch.dict(os.environ, DYM_CACHE_DIR=cache_dir):
+                Model.get("dym/pools", cache=True)
+                rv = Model.get("dym/pools", cache=True)
+                self.assertEqual(rv.version, "2.0")
+                rv = Model.get("dym/pools", version="2.0", cache=True)
+                self.assertEqual(rv.version, "2.0")
+                mock_request.assert_called_once()
+
+                # Latest version expired, pinned version did not
+                with patch("dymaxionlabs.models.LATEST_VERSION_TTL", -1):
+                    Model.get("dym/pools", version="2.0", cache=True)
+                    self.assertEqual(mock_request.call_count, 1)
+                    Model.get("dym/pools", cache=True)
+                    self.assertEqual(mock_request.call_count, 2)
+
+    @patch("dymaxionlabs.models.time.sleep")
+    @patch("dymaxionlabs.models.Model.predict")
+    def test_predict_many(self, mock_predict, mock_sleep):
+        tasks = [MagicMock(name=f"task{i}") for i in range(4)]
+        for task in tasks:
+            task.is_running.side_effect = [True, False]
+        mock_predict.side_effect = tasks
+        rv = self.model.predict_many(["a", "b", "c", "d"], max_in_flight=2)
+        self.assertListEqual(rv, tasks)
+        self.assertListEqual([c.args[0] for c in mock_predict.call_args_list],
+                             ["a", "b", "c", "d"])
+        # Waited for the first two tasks before submitting the rest
+        tasks[0].is_running.assert_called()
+        mock_sleep.assert_called_once_with(5)
+
+    @patch("dymaxionlabs.utils.time.sleep")
+    @patch("dymaxionlabs.models.Model.predict")
+    def test_predict_many_retries_throttled(self, mock_predict, mock_sleep):
+        task = MagicMock()
+        mock_predict.side_effect = [
+            TooManyRequestsError("slow down", retry_after=3), task
+        ]
+        rv = self.model.predict_many(["a"])
+        self.assertListEqual(rv, [task])
+        mock_sleep.assert_called_once_with(3)
+
+    def test_predict_many_invalid_max_in_flight(self):
+        with self.assertRaises(ValueError):
+            self.model.predict_many(["a"], max_in_flight=0)
+
+    @patch("dymaxionlabs.models.Model.predict")
+    def test_predict_many_error_keeps_started_tasks(self, mock_predict):
+        task = MagicMock()
+        mock_predict.side_effect = [task, RuntimeError("boom")]
+        with self.assertRaises(RuntimeError) as ctx:
+            self.model.predict_many(["a", "b"])
+        self.assertListEqual(ctx.exception.tasks, [task])
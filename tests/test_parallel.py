@@ -0,0 +1,67 @@
+import multiprocessing
+import os
+import pickle
+
+import pytest
+
+from dymaxionlabs import parallel, utils
+from dymaxionlabs.files import File
+from dymaxionlabs.utils import ChecksumMismatchError
+
+__author__ = "Dymaxion Labs"
+__copyright__ = "Dymaxion Labs"
+__license__ = "apache-2.0"
+
+fork_only = pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+
+
+@fork_only
+def test_session_is_recreated_after_fork():
+    session = utils.get_session()
+    assert utils.get_session() is session
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            ok = utils._session is None and utils.get_session() is not session
+            os.write(w, b"1" if ok else b"0")
+        finally:
+            os._exit(0)
+    os.close(w)
+    os.waitpid(pid, 0)
+    assert os.read(r, 1) == b"1"
+    os.close(r)
+
+
+def test_checksum_mismatch_error_is_picklable():
+    err = pickle.loads(pickle.dumps(ChecksumMismatchError("a.tif", "md5", "x", "y")))
+    assert (err.path, err.algorithm, err.expected, err.actual) == ("a.tif", "md5", "x", "y")
+
+
+def test_split():
+    assert parallel._split(list(range(5)), 2) == [[0, 1, 2], [3, 4]]
+    assert parallel._split([1], 4) == [[1]]
+    assert parallel._split([], 4) == []
+
+
+@fork_only
+def test_upload_and_download_many(fake_api, tmp_path):
+    items = []
+    for i in range(10):
+        path = tmp_path / f"{i}.bin"
+        path.write_bytes(bytes([i]) * (i + 1) * 100)
+        items.append((str(path), f"tiles/{i}.bin"))
+    items.append((str(tmp_path / "missing.bin"), "tiles/missing.bin"))
+
+    context = multiprocessing.get_context("fork")
+    report = parallel.upload_many(items, processes=2, progress=False, mp_context=context)
+    assert isinstance(report.pop(str(tmp_path / "missing.bin")), FileNotFoundError)
+    assert sorted(file.path for file in report.values()) == sorted(p for _, p in items[:-1])
+
+    files = list(File.iter_all("tiles/*"))
+    out = tmp_path / "out"
+    report = parallel.download_many([(f, str(out / f.name)) for f in files],
+                                    processes=2, progress=False, mp_context=context)
+    assert len(report) == 10
+    for i in range(10):
+        assert (out / f"{i}.bin").read_bytes() == bytes([i]) * (i + 1) * 100
@@ -0,0 +1,59 @@
+import unittest
+from unittest.mock import ANY, MagicMock, patch
+
+from dymaxionlabs.pipeline import run_pipeline
+
+__author__ = "Dymaxion Labs"
+__copyright__ = "Dymaxion Labs"
+__license__ = "apache-2.0"
+
+
+class PipelineTest(unittest.TestCase):
+    def setUp(self):
+        self.model = MagicMock()
+
+        def predict(input_dir):
+            task = MagicMock(state='FINISHED')
+            task.download_artifacts.side_effect = \
+                lambda output_dir, **kwargs: [f"{output_dir}/{input_dir}"]
+            return task
+
+        self.model.predict.side_effect = predict
+
+    @patch("dymaxionlabs.pipeline.File._delete")
+    @patch("dymaxionlabs.pipeline.File.upload")
+    def test_run_pipeline(self, mock_upload, mock_delete):
+        mock_upload.side_effect = lambda path, storage_path, **kwargs: \
+            MagicMock(path=f"{storage_path}{path}")
+        rv = run_pipeline(self.model, ["a.tif", "b.tif", "c.tif"],
+                          output_dir="out",
+                          storage_dir="in",
+                          batch_size=2,
+                          run_id="run1")
+        self.assertEqual(mock_upload.call_count, 3)
+        mock_upload.assert_any_call("c.tif", "in/run1/batch_00001/",
+                                    progress=ANY)
+        self.assertListEqual(rv, [["out/batch_00000/in/run1/batch_00000/"],
+                                  ["out/batch_00001/in/run1/batch_00001/"]])
+        # Uploaded inputs are deleted after predicting
+        self.assertEqual(sorted(c.args[0] for c in mock_delete.call_args_list),
+                         ["in/run1/batch_00000/a.tif", "in/run1/batch_00000/b.tif",
+                          "in/run1/batch_00001/c.tif"])
+
+    @patch("dymaxionlabs.pipeline.File._delete")
+    @patch("dymaxionlabs.pipeline.File.upload")
+    def test_run_pipeline_unique_run_dirs(self, mock_upload, mock_delete):
+        for _ in range(2):
+            run_pipeline(self.model, [["a.tif"]], keep_inputs=True)
+        dirs = [c.args[1] for c in mock_upload.call_args_list]
+        self.assertEqual(len(set(dirs)), 2)
+        self.assertTrue(all(d.startswith("pipelines/") for d in dirs))
+        mock_delete.assert_not_called()
+
+    @patch("dymaxionlabs.pipeline.File._delete")
+    @patch("dymaxionlabs.pipeline.File.upload")
+    def test_run_pipeline_failed_task(self, mock_upload, mock_delete):
+        self.model.predict.side_effect = None
+        self.model.predict.return_value = MagicMock(state='FAILED')
+        with self.assertRaises(RuntimeError):
+            run_pipeline(self.model, [["a.tif"], ["b.tif"]])
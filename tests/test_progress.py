@@ -0,0 +1,47 @@
+import functools
+import unittest
+
+from dymaxionlabs.progress import (AggregateProgress, CallbackProgress,
+                                   NullProgress, Progress, get_progress)
+
+__author__ = "Dymaxion Labs"
+__copyright__ = "Dymaxion Labs"
+__license__ = "apache-2.0"
+
+
+class ProgressTest(unittest.TestCase):
+    def test_progress(self):
+        progress = Progress("foo", total=100)
+        progress.update(30)
+        progress.update(20)
+        self.assertEqual(progress.transferred, 50)
+        self.assertIsNotNone(progress.average_rate)
+        self.assertIsNotNone(progress.eta)
+
+    def test_aggregate_progress(self):
+        reporter = Progress("all")
+        with AggregateProgress(reporter) as aggregate:
+            a = aggregate("a", total=10)
+            b = aggregate("b")
+            b.set_total(5)
+            a.update(10)
+            b.update(3)
+        self.assertEqual(reporter.total, 15)
+        self.assertEqual(reporter.transferred, 13)
+        self.assertTrue(reporter.closed)
+
+    def test_callback_progress(self):
+        calls = []
+        factory = functools.partial(
+            CallbackProgress,
+            callback=lambda p: calls.append((p.transferred, p.closed)))
+        with get_progress(factory, "foo", 10) as progress:
+            progress.update(4)
+            progress.update(6)
+        self.assertListEqual(calls, [(4, False), (10, False), (10, True)])
+
+    def test_get_progress(self):
+        self.assertIsInstance(get_progress(False), NullProgress)
+        self.assertIsInstance(get_progress("none"), NullProgress)
+        with self.assertRaises(ValueError):
+            get_progress("foo")
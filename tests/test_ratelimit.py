@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from dymaxionlabs.ratelimit import RateLimiter, get_endpoint_class
+
+__author__ = "Dymaxion Labs"
+__copyright__ = "Dymaxion Labs"
+__license__ = "apache-2.0"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch("dymaxionlabs.ratelimit.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_token_bucket(self):
+        limiter = RateLimiter(dict(upload=2), burst=2)
+        for _ in range(4):
+            limiter.acquire('upload')
+        self.assertEqual(self.clock.sleeps, [0.5, 0.5])
+        # Other endpoint classes are not limited
+        limiter.acquire('metadata')
+        self.assertEqual(len(self.clock.sleeps), 2)
+
+    def test_cool_down(self):
+        limiter = RateLimiter()
+        limiter.cool_down(3)
+        limiter.acquire('metadata')
+        self.assertEqual(self.clock.sleeps, [3])
+
+    def test_shared_between_processes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'ratelimit.json')
+            RateLimiter(path=path).cool_down(5)
+            RateLimiter(path=path).wait()
+        self.assertEqual(self.clock.sleeps, [5])
+
+    def test_get_endpoint_class(self):
+        self.assertEqual(get_endpoint_class('/storage/upload/'), 'upload')
+        self.assertEqual(get_endpoint_class('/storage/download/'), 'download')
+        self.assertEqual(get_endpoint_class('/tasks/1/download-artifacts/'),
+                         'download')
+        self.assertEqual(get_endpoint_class('/tasks/?page=2'), 'metadata')
@@ -0,0 +1,98 @@
+import io
+import os
+import re
+from unittest.mock import patch
+
+import pytest
+
+from dymaxionlabs.files import File
+from dymaxionlabs.remote import RemoteFile, _coalesce
+
+__author__ = "Dymaxion Labs"
+__copyright__ = "Dymaxion Labs"
+__license__ = "apache-2.0"
+
+
+@pytest.fixture
+def content(fake_api):
+    content = os.urandom(10 * 1024 + 17)
+    fake_api.state.add_file("images/ortho.tif", content)
+    return content
+
+
+def test_coalesce():
+    assert _coalesce([5, 1, 2, 3, 7, 8]) == [[1, 4], [5, 6], [7, 9]]
+
+
+def test_random_reads(fake_api, content):
+    f = File.get("images/ortho.tif").open(block_size=1024, read_ahead=0)
+    assert f.size == len(content)
+    f.seek(5000)
+    assert f.read(100) == content[5000:5100]
+    f.seek(-10, io.SEEK_END)
+    assert f.read() == content[-10:]
+    assert f.tell() == len(content)
+    assert f.read(1) == b''
+    # Cached blocks are not fetched again
+    f.seek(5050)
+    assert f.read(10) == content[5050:5060]
+    assert f.requests == 2
+    assert fake_api.state.requests["download_file"] == 2
+
+
+def test_adjacent_blocks_are_coalesced(fake_api, content):
+    f = RemoteFile("images/ortho.tif", block_size=1024, read_ahead=0)
+    assert f.read(4000) == content[:4000]
+    assert f.size == len(content)
+    assert f.requests == 1
+
+
+def test_read_ahead_on_sequential_reads(fake_api, content):
+    f = RemoteFile("images/ortho.tif", size=len(content), block_size=1024, read_ahead=2)
+    chunks = [f.read(512) for _ in range(6)]
+    assert b"".join(chunks) == content[:3072]
+    assert f.requests == 1
+
+
+def test_lru_eviction(fake_api, content):
+    f = RemoteFile("images/ortho.tif", block_size=1024, cache_blocks=2, read_ahead=0)
+    for pos in (0, 2048, 4096, 0):
+        f.seek(pos)
+        assert f.read(10) == content[pos:pos + 10]
+    assert f.requests == 4
+
+
+def test_retries_dropped_connections(fake_api, content):
+    f = RemoteFile("images/ortho.tif", block_size=1024)
+    fake_api.faults.drop_next("download_file")
+    f.seek(3000)
+    assert f.read(2000) == content[3000:5000]
+
+
+def test_closed_file(fake_api, content):
+    with File.get("images/ortho.tif").open() as f:
+        f.read(10)
+    with pytest.raises(ValueError):
+        f.read(10)
+
+
+def test_read_larger_than_cache(fake_api, content):
+    f = RemoteFile("images/ortho.tif", size=len(content), block_size=1024,
+                   cache_blocks=2, read_ahead=0)
+    assert f.read() == content
+    assert f.requests == 1
+    assert len(f._blocks) == 2
+    # The last blocks are kept in cache
+    f.seek(-100, io.SEEK_END)
+    assert f.read() == content[-100:]
+    assert f.requests == 1
+
+
+def test_range_not_supported(fake_api, content):
+    f = RemoteFile("images/ortho.tif", block_size=1024, read_ahead=0)
+    with patch("dymaxionlabs.testing._RANGE_RE", re.compile(r"(?!)")):
+        for pos in (0, 5000, 9000):
+            f.seek(pos)
+            assert f.read(100) == content[pos:pos + 100]
+    assert f.size == len(content)
+    assert f.requests == 1
@@ -1,5 +1,7 @@
+import os
+import tempfile
 import unittest
-from unittest.mock import patch
+from unittest.mock import ANY, patch
 
 from requests.utils import quote
 
@@ -57,7 +59,48 @@ class TasksTest(unittest.TestCase):
                                          metadata=None,
                                          error=None,
                                          args=None,
-                                         kwargs=None)
+                                         kwargs=None,
+                                         progress=50)
         rv = self.task.refresh()
         mock_request.assert_called_once_with('get', '/tasks/t1/')
+        self.assertIs(rv, self.task)
         self.assertEqual(rv.state, "RUNNING")
+        self.assertEqual(rv.extra_attributes, dict(progress=50))
+
+    @patch("dymaxionlabs.tasks._get_remote_size")
+    @patch("dymaxionlabs.files.File._download")
+    @patch("dymaxionlabs.tasks.request")
+    def test_download_artifacts_parallel(self, mock_request, mock_download,
+                                         mock_get_remote_size):
+        mock_request.return_value = {
+            'files': ['tasks/t1/out/a.tif', 'tasks/t1/out/sub/b.tif',
+                      'tasks/t1/out/c.json']
+        }
+        mock_download.side_effect = lambda path, output_file, **kwargs: output_file
+        with tempfile.TemporaryDirectory() as output_dir:
+            rv = self.task.download_artifacts(output_dir,
+                                              parallel=True,
+                                              pattern='*.tif')
+            mock_request.assert_called_once_with(
+                'get', '/tasks/t1/list-artifacts/')
+            self.assertListEqual(rv, [
+                os.path.join(output_dir, 'a.tif'),
+                os.path.join(output_dir, 'sub', 'b.tif'),
+            ])
+            mock_get_remote_size.assert_not_called()
+
+    @patch("dymaxionlabs.tasks._get_remote_size")
+    @patch("dymaxionlabs.files.File._download")
+    @patch("dymaxionlabs.tasks.request")
+    def test_download_artifacts_skips_existing(self, mock_request,
+                                               mock_download,
+                                               mock_get_remote_size):
+        mock_request.return_value = {'files': ['out/a.tif', 'out/b.tif']}
+        mock_download.side_effect = lambda path, output_file, **kwargs: output_file
+        mock_get_remote_size.return_value = 3
+        with tempfile.TemporaryDirectory() as output_dir:
+            with open(os.path.join(output_dir, 'a.tif'), 'wb') as f:
+                f.write(b'foo')
+            self.task.download_artifacts(output_dir, parallel=True)
+            mock_download.assert_called_once_with(
+                'out/b.tif', os.path.join(output_dir, 'b.tif'), progress=ANY)
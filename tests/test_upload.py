@@ -0,0 +1,75 @@
+import io
+import os
+from unittest.mock import patch
+
+import pytest
+
+from dymaxionlabs.files import File
+from dymaxionlabs.upload import IterableStream
+
+__author__ = "Dymaxion Labs"
+__copyright__ = "Dymaxion Labs"
+__license__ = "apache-2.0"
+
+
+def test_iterable_stream():
+    stream = IterableStream(iter([b"abc", b"", b"defgh", b"ij"]))
+    assert stream.read(4) == b"abcd"
+    assert stream.tell() == 4
+    assert stream.read(2) == b"ef"
+    # Can seek back within the last read, but not further
+    stream.seek(4)
+    assert stream.read(3) == b"efg"
+    with pytest.raises(io.UnsupportedOperation):
+        stream.seek(0)
+    assert stream.read() == b"hij"
+    assert stream.read(10) == b""
+
+
+def test_iterable_stream_from_file():
+    stream = IterableStream(io.BytesIO(b"0123456789"))
+    assert stream.read(8) == b"01234567"
+    stream.seek(2)
+    assert stream.read(3) == b"234"
+    assert stream.read(10) == b"56789"
+
+
+def test_upload_stream_small(fake_api):
+    with patch.object(File, "_resumable_upload_stream") as mock_resumable:
+        file = File.upload_stream(iter([b"foo", b"bar"]), "data/foo.txt")
+        mock_resumable.assert_not_called()
+    assert file.path == "data/foo.txt"
+    assert fake_api.state.files["data/foo.txt"] == b"foobar"
+    assert fake_api.state.requests["upload_file"] == 1
+
+
+@pytest.mark.parametrize("size", [3 * 2**20 + 123, 2 * 2**20])
+def test_upload_stream_unknown_size(fake_api, size):
+    content = os.urandom(size)
+    chunks = (content[i:i + 100000] for i in range(0, len(content), 100000))
+    file = File.upload_stream(chunks, "data/large.bin")
+    assert file.path == "data/large.bin"
+    assert fake_api.state.files["data/large.bin"] == content
+    assert fake_api.state.requests["upload_file"] == 0
+
+
+@patch("dymaxionlabs.upload.time.sleep")
+def test_upload_stream_known_size_with_faults(mock_sleep, fake_api):
+    content = os.urandom(3 * 2**20)
+    fake_api.faults.drop_next("upload_chunk")
+    file = File.upload_stream(io.BytesIO(content), "data/large.bin")
+    assert file.path == "data/large.bin"
+    assert fake_api.state.files["data/large.bin"] == content
+
+
+@patch("dymaxionlabs.upload.requests.put")
+def test_transmit_chunk_timeout(mock_put):
+    import requests
+
+    from dymaxionlabs.upload import CustomResumableUpload
+    from dymaxionlabs.utils import DEFAULT_TIMEOUT
+
+    mock_put.side_effect = requests.ReadTimeout()
+    assert CustomResumableUpload._transmit_chunk("http://x/", b"data", {}) is None
+    mock_put.assert_called_once_with("http://x/", data=b"data", headers={},
+                                     timeout=DEFAULT_TIMEOUT)